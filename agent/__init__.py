@@ -2,8 +2,14 @@
 Agent package for offline coding assistant.
 """
 
-from .model import CodeAssistant
 from .memory import ConversationMemory
 from .code_tools import CodeTools
 
-__all__ = ["CodeAssistant", "ConversationMemory", "CodeTools"] 
\ No newline at end of file
+__all__ = ["CodeAssistant", "ConversationMemory", "CodeTools"]
+
+def __getattr__(name):
+    # Importing llama_cpp is slow, so the model layer loads on first access
+    if name == "CodeAssistant":
+        from .model import CodeAssistant
+        return CodeAssistant
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}") 
\ No newline at end of file
@@ -3,28 +3,199 @@ Advanced code analyzer with AI-powered insights
 """
 
 import ast
+import hashlib
+import mmap
 import os
+import re
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Tuple, Union
 import json
 
 from .model import CodeAssistant
-from .code_tools import CodeTools
+from .code_tools import CodeTools, CodeFacts
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib json module
+    orjson = None
+
+INSIGHTS_PROMPT = """Analyze this {language} code and provide insights:
+
+{code}
+
+Please provide:
+1. Code quality assessment
+2. Potential issues or bugs
+3. Performance considerations
+4. Best practices suggestions
+5. Overall architecture assessment
+
+Be concise but thorough."""
+
+IMPROVEMENTS_PROMPT = """Review this {language} code and suggest specific improvements:
+
+{code}
+
+Focus on:
+- Code structure and organization
+- Performance optimizations
+- Error handling
+- Readability improvements
+- Security considerations
+
+Provide concrete, actionable suggestions."""
+
+DOCUMENTATION_PROMPT = """Generate comprehensive documentation for this {language} code:
+
+{code}
+
+Include:
+- Module/class/function descriptions
+- Parameter documentation
+- Return value descriptions
+- Usage examples
+- Any important notes or warnings
+
+Format as markdown."""
+
+SECURITY_PROMPT = """Analyze this {language} code for security vulnerabilities:
+
+{code}
+
+Look for:
+- SQL injection risks
+- XSS vulnerabilities  
+- Command injection
+- Insecure random number generation
+- Hardcoded credentials
+- Unsafe file operations
+- Input validation issues
+
+List any security concerns found."""
+
+# Common Python security issues: (source pattern, message)
+PYTHON_SECURITY_PATTERNS = [
+    ('eval', 'Use of eval() can be dangerous'),
+    ('exec', 'Use of exec() can be dangerous'),
+    ('os.system', 'Use of os.system() can be vulnerable to injection'),
+    ('subprocess.call', 'Check subprocess.call() for injection vulnerabilities'),
+    ('pickle.loads', 'Pickle deserialization can be dangerous'),
+    ('yaml.load', 'Use yaml.safe_load() instead of yaml.load()'),
+    ('shell=True', 'subprocess with shell=True can be vulnerable'),
+    ('input(', 'raw_input/input can be dangerous in Python 2'),
+]
+
+# Lookahead alternation so overlapping occurrences are all reported
+_PYTHON_SECURITY_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(pattern) for pattern, _ in PYTHON_SECURITY_PATTERNS) + '))'
+)
+
+def _read_source(file_path: Path) -> Tuple[str, int]:
+    """Read a UTF-8 source file, returning its text and size in bytes"""
+    
+    with open(file_path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        if not file_size:
+            return '', 0
+        # Decode straight from the mapping rather than copying into a bytes object first
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            code = str(mm, 'utf-8')
+    
+    # Match text-mode universal newlines
+    if '\r' in code:
+        code = code.replace('\r\n', '\n').replace('\r', '\n')
+    
+    return code, file_size
+
+def _json_line(record: Dict[str, Any]) -> bytes:
+    """Serialize one record as an NDJSON line"""
+    
+    if orjson is not None:
+        return orjson.dumps(record) + b'\n'
+    return (json.dumps(record) + '\n').encode('utf-8')
+
+def _basic_file_results(file_path: Path, code: str, file_size: int, code_tools: CodeTools) -> Dict[str, Any]:
+    """Model-free analysis of a single file's source"""
+    
+    language = code_tools.detect_language(str(file_path))
+    facts = CodeFacts.from_source(code, language)
+    
+    results = {
+        'file_path': str(file_path),
+        'language': language,
+        'file_size': file_size,
+        'line_count': len(facts.lines)
+    }
+    
+    # Basic analysis
+    results['complexity'] = code_tools.estimate_complexity(code, language, facts)
+    results['imports'] = code_tools.extract_imports(code, language, facts)
+    results['functions'] = code_tools.find_functions(code, language, facts)
+    
+    # Syntax validation
+    is_valid, error = code_tools.validate_syntax(code, language, facts)
+    results['syntax_valid'] = is_valid
+    if not is_valid:
+        results['syntax_error'] = error
+    
+    return results
+
+def _analyze_file_worker(file_path: Path, include_source: bool = False) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Process-pool entry point for the model-free part of file analysis"""
+    
+    # The source is handed back when the parent needs it for AI prompts,
+    # so the parent never reads the file a second time
+    try:
+        code, file_size = _read_source(file_path)
+        return _basic_file_results(file_path, code, file_size, CodeTools()), code if include_source else None
+    except Exception as e:
+        return {'error': str(e), 'file_path': str(file_path)}, None
 
 class CodeAnalyzer:
     """Advanced code analysis with AI insights"""
     
-    def __init__(self, model_path: str):
-        self.assistant = CodeAssistant(model_path)
+    # Maximum number of AI responses kept for identical prompts
+    RESPONSE_CACHE_SIZE = 512
+    
+    # Files whose AI prompts are sent together during directory analysis
+    AI_BATCH_FILES = 16
+    
+    # Files larger than this are listed but not read when analyzing a directory
+    MAX_ANALYZE_BYTES = 2 * 1024 * 1024
+    
+    # AI security review: files this small are only reviewed when a pattern matched,
+    # and matched files send up to SNIPPET_LIMIT windows of +/- SNIPPET_RADIUS chars
+    SECURITY_AI_MIN_CHARS = 1024
+    SECURITY_SNIPPET_RADIUS = 200
+    SECURITY_SNIPPET_LIMIT = 8
+    
+    # Extensions treated as source files when walking directories
+    _CODE_EXTS = frozenset({
+        '.py', '.js', '.ts', '.java', '.cpp', '.c', '.cs', '.php', 
+        '.rb', '.go', '.rs', '.swift', '.kt', '.scala', '.html', 
+        '.css', '.sql', '.sh', '.r', '.m'
+    })
+    
+    def __init__(self, model_path: Union[str, CodeAssistant], max_analyze_bytes: int = MAX_ANALYZE_BYTES):
+        # Accept an already loaded assistant so callers don't load the weights twice
+        self.assistant = model_path if isinstance(model_path, CodeAssistant) else CodeAssistant.get(model_path)
+        self.max_analyze_bytes = max_analyze_bytes
         self.code_tools = CodeTools()
+        self._response_cache: "OrderedDict[str, str]" = OrderedDict()
+        self.cache_stats = {'initial': 0, 'cached': 0}
         
-    def analyze_code(self, path: Path, deep_analysis: bool = False, generate_docs: bool = False, security_scan: bool = False) -> Dict[str, Any]:
+    def analyze_code(self, path: Path, deep_analysis: bool = False, generate_docs: bool = False, security_scan: bool = False, output_path: Optional[Path] = None) -> Dict[str, Any]:
         """Analyze code file or directory"""
         
         if path.is_file():
             return self.analyze_file(path, deep_analysis, generate_docs, security_scan)
         elif path.is_dir():
-            return self.analyze_directory(path, deep_analysis, generate_docs, security_scan)
+            return self.analyze_directory(path, deep_analysis, generate_docs, security_scan, output_path)
         else:
             raise ValueError(f"Path not found: {path}")
     
@@ -32,60 +203,49 @@ class CodeAnalyzer:
         """Analyze a single file"""
         
         try:
-            code = file_path.read_text(encoding='utf-8')
-            language = self.code_tools.detect_language(str(file_path))
-            
-            results = {
-                'file_path': str(file_path),
-                'language': language,
-                'file_size': file_path.stat().st_size,
-                'line_count': len(code.split('\n'))
-            }
-            
-            # Basic analysis
-            results['complexity'] = self.code_tools.estimate_complexity(code, language)
-            results['imports'] = self.code_tools.extract_imports(code, language)
-            results['functions'] = self.code_tools.find_functions(code, language)
-            
-            # Syntax validation
-            is_valid, error = self.code_tools.validate_syntax(code, language)
-            results['syntax_valid'] = is_valid
-            if not is_valid:
-                results['syntax_error'] = error
-            
-            # Deep analysis with AI
-            if deep_analysis:
-                results['ai_insights'] = self.get_ai_insights(code, language)
-                results['improvement_suggestions'] = self.get_improvement_suggestions(code, language)
-            
-            # Documentation generation
-            if generate_docs:
-                results['generated_docs'] = self.generate_documentation(code, language)
-            
-            # Security analysis
-            if security_scan:
-                results['security_issues'] = self.scan_security_issues(code, language)
-            
+            code, file_size = _read_source(file_path)
+            results = _basic_file_results(file_path, code, file_size, self.code_tools)
+            self._add_ai_results(results, code, deep_analysis, generate_docs, security_scan)
             return results
             
         except Exception as e:
             return {'error': str(e), 'file_path': str(file_path)}
     
+    def _add_ai_results(self, results: Dict[str, Any], code: str, deep_analysis: bool, generate_docs: bool, security_scan: bool):
+        """Add the model-backed parts of a file analysis to its basic results"""
+        
+        language = results['language']
+        
+        # Deep analysis with AI
+        if deep_analysis:
+            results['ai_insights'] = self.get_ai_insights(code, language)
+            results['improvement_suggestions'] = self.get_improvement_suggestions(code, language)
+        
+        # Documentation generation
+        if generate_docs:
+            results['generated_docs'] = self.generate_documentation(code, language)
+        
+        # Security analysis
+        if security_scan:
+            results['security_issues'] = self.scan_security_issues(code, language, deep_analysis)
+    
     def analyze_code_string(self, code: str, language: str = "python", deep_analysis: bool = False) -> Dict[str, Any]:
         """Analyze code from string"""
         
+        facts = CodeFacts.from_source(code, language)
+        
         results = {
             'language': language,
-            'line_count': len(code.split('\n'))
+            'line_count': len(facts.lines)
         }
         
         # Basic analysis
-        results['complexity'] = self.code_tools.estimate_complexity(code, language)
-        results['imports'] = self.code_tools.extract_imports(code, language)
-        results['functions'] = self.code_tools.find_functions(code, language)
+        results['complexity'] = self.code_tools.estimate_complexity(code, language, facts)
+        results['imports'] = self.code_tools.extract_imports(code, language, facts)
+        results['functions'] = self.code_tools.find_functions(code, language, facts)
         
         # Syntax validation
-        is_valid, error = self.code_tools.validate_syntax(code, language)
+        is_valid, error = self.code_tools.validate_syntax(code, language, facts)
         results['syntax_valid'] = is_valid
         if not is_valid:
             results['syntax_error'] = error
@@ -96,8 +256,8 @@ class CodeAnalyzer:
         
         return results
     
-    def analyze_directory(self, dir_path: Path, deep_analysis: bool = False, generate_docs: bool = False, security_scan: bool = False) -> Dict[str, Any]:
-        """Analyze entire directory"""
+    def analyze_directory(self, dir_path: Path, deep_analysis: bool = False, generate_docs: bool = False, security_scan: bool = False, output_path: Optional[Path] = None) -> Dict[str, Any]:
+        """Analyze entire directory, optionally streaming per-file results to an NDJSON file"""
         
         results = {
             'directory_path': str(dir_path),
@@ -107,160 +267,298 @@ class CodeAnalyzer:
         
         total_files = 0
         total_lines = 0
-        languages = {}
+        skipped_files = 0
+        languages = Counter()
         issues = []
         
-        # Analyze each code file
-        for file_path in dir_path.rglob('*'):
-            if file_path.is_file() and self.is_code_file(file_path):
-                try:
-                    file_results = self.analyze_file(file_path, deep_analysis, generate_docs, security_scan)
-                    results['files_analyzed'].append(file_results)
-                    
-                    total_files += 1
-                    total_lines += file_results.get('line_count', 0)
-                    
-                    lang = file_results.get('language', 'unknown')
-                    languages[lang] = languages.get(lang, 0) + 1
+        with (open(output_path, 'wb') if output_path is not None else nullcontext()) as output:
+            # With an output file, per-file results go to disk as they are final
+            # instead of accumulating in memory
+            if output is not None:
+                del results['files_analyzed']
+                results['output_path'] = str(output_path)
+                emit = lambda record: output.write(_json_line(record))
+            else:
+                emit = results['files_analyzed'].append
+            
+            def code_files():
+                """Paths to analyze, pulled from the walk as the window has room for them"""
+                nonlocal skipped_files
+                for file_path, file_size in self._iter_code_files(dir_path):
+                    # Generated blobs and vendored dumps are listed without being read
+                    if file_size > self.max_analyze_bytes:
+                        emit({
+                            'file_path': str(file_path),
+                            'language': self.code_tools.detect_language(str(file_path)),
+                            'file_size': file_size,
+                            'skipped': 'too_large'
+                        })
+                        skipped_files += 1
+                    else:
+                        yield file_path
+            
+            # Basic analysis is CPU-bound and model-free, so spread it across processes;
+            # AI prompts are sent from this process, where the model is loaded, in
+            # batches of AI_BATCH_FILES files while the workers keep parsing
+            needs_ai = deep_analysis or generate_docs or security_scan
+            worker = partial(_analyze_file_worker, include_source=needs_ai)
+            pending_ai = []
+            
+            def flush_ai():
+                self._add_ai_results_batch(pending_ai, deep_analysis, generate_docs, security_scan)
+                if output is not None:
+                    for file_results, _ in pending_ai:
+                        emit(file_results)
+                # Drop the batch's sources now that their prompts have been answered
+                pending_ai.clear()
+            
+            # The pool starts its processes on the first submit, so an empty tree costs nothing
+            workers = os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Only a bounded window of files is in the pool at a time, so results
+                # don't pile up in finished futures while the model answers a batch
+                files = code_files()
+                in_flight = deque(
+                    (file_path, executor.submit(worker, file_path))
+                    for file_path in islice(files, self.AI_BATCH_FILES * workers)
+                )
+                
+                while in_flight:
+                    done_path, future = in_flight.popleft()
+                    file_results, code = future.result()
+                    file_path = next(files, None)
+                    if file_path is not None:
+                        in_flight.append((file_path, executor.submit(worker, file_path)))
                     
-                    if not file_results.get('syntax_valid', True):
-                        issues.append(f"{file_path}: {file_results.get('syntax_error', 'Syntax error')}")
+                    try:
+                        if code is not None:
+                            pending_ai.append((file_results, code))
+                        
+                        # Streamed records are written once their AI results are in
+                        if output is None or code is None:
+                            emit(file_results)
                         
-                except Exception as e:
-                    issues.append(f"{file_path}: {str(e)}")
+                        total_files += 1
+                        total_lines += file_results.get('line_count', 0)
+                        
+                        languages[file_results.get('language', 'unknown')] += 1
+                        
+                        if not file_results.get('syntax_valid', True):
+                            issues.append(f"{done_path}: {file_results.get('syntax_error', 'Syntax error')}")
+                            
+                    except Exception as e:
+                        issues.append(f"{done_path}: {str(e)}")
+                    
+                    if len(pending_ai) >= self.AI_BATCH_FILES:
+                        flush_ai()
+            
+            if pending_ai:
+                flush_ai()
         
         # Create summary
         results['summary'] = {
             'total_files': total_files,
             'total_lines': total_lines,
-            'languages': languages,
+            'skipped_files': skipped_files,
+            'languages': dict(languages),
             'issues_found': len(issues),
             'issues': issues
         }
         
         return results
     
+    def _cache_key(self, prompt: str) -> str:
+        """Digest identifying a prompt at the current generation length"""
+        
+        # Key on a digest so the cache does not retain full prompts
+        return hashlib.blake2b(
+            f"{self.assistant.max_tokens}\0{prompt}".encode('utf-8'), digest_size=16
+        ).hexdigest()
+    
+    def _remember(self, key: str, response: str):
+        """Store a fresh response in the LRU cache"""
+        
+        self.cache_stats['initial'] += 1
+        
+        # Don't pin failures in the cache
+        if not response.startswith("Error generating response:"):
+            self._response_cache[key] = response
+            if len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+    
+    def _cached_generate(self, prompt: str) -> str:
+        """Generate a response, reusing the previous one for an identical prompt"""
+        
+        return self._cached_generate_batch([prompt])[0]
+    
+    def _cached_generate_batch(self, prompts: List[str]) -> List[str]:
+        """Generate responses for several prompts, only sending cache misses to the model"""
+        
+        keys = [self._cache_key(prompt) for prompt in prompts]
+        responses: Dict[str, str] = {}
+        missing: Dict[str, str] = {}
+        
+        for key, prompt in zip(keys, prompts):
+            cached = self._response_cache.get(key)
+            if cached is not None:
+                self._response_cache.move_to_end(key)
+                responses[key] = cached
+                self.cache_stats['cached'] += 1
+            elif key in missing:
+                self.cache_stats['cached'] += 1  # Duplicate within this batch
+            else:
+                missing[key] = prompt
+        
+        if missing:
+            generated = self.assistant.generate_batch(list(missing.values()))
+            for key, response in zip(missing, generated):
+                responses[key] = response
+                self._remember(key, response)
+        
+        return [responses[key] for key in keys]
+    
+    def _add_ai_results_batch(self, pending: List[Tuple[Dict[str, Any], str]], deep_analysis: bool, generate_docs: bool, security_scan: bool):
+        """Add model-backed results for many files, sending one prompt batch per kind"""
+        
+        kinds = []
+        if deep_analysis:
+            kinds.append(('ai_insights', INSIGHTS_PROMPT, "AI analysis failed"))
+            kinds.append(('improvement_suggestions', IMPROVEMENTS_PROMPT, "Improvement analysis failed"))
+        if generate_docs:
+            kinds.append(('generated_docs', DOCUMENTATION_PROMPT, "Documentation generation failed"))
+        
+        for key, template, failure in kinds:
+            prompts = [template.format(language=results['language'], code=code) for results, code in pending]
+            try:
+                responses = self._cached_generate_batch(prompts)
+            except Exception as e:
+                responses = [f"{failure}: {str(e)}"] * len(prompts)
+            for (results, _), response in zip(pending, responses):
+                results[key] = response
+        
+        if security_scan:
+            reviews = []
+            for results, code in pending:
+                matches = self._security_matches(code, results['language'])
+                results['security_issues'] = self._pattern_security_issues(matches)
+                source = self._ai_security_source(code, matches, deep_analysis)
+                if source is not None:
+                    reviews.append((results, SECURITY_PROMPT.format(language=results['language'], code=source)))
+            
+            if reviews:
+                try:
+                    responses = self._cached_generate_batch([prompt for _, prompt in reviews])
+                except Exception:
+                    responses = [None] * len(reviews)
+                for (results, _), response in zip(reviews, responses):
+                    if response is not None and "No security issues" not in response:
+                        results['security_issues'].append(f"AI Security Analysis: {response}")
+    
     def get_ai_insights(self, code: str, language: str) -> str:
         """Get AI-powered insights about the code"""
         
-        prompt = f"""Analyze this {language} code and provide insights:
-
-{code}
-
-Please provide:
-1. Code quality assessment
-2. Potential issues or bugs
-3. Performance considerations
-4. Best practices suggestions
-5. Overall architecture assessment
-
-Be concise but thorough."""
-        
         try:
-            return self.assistant.generate_response(prompt)
+            return self._cached_generate(INSIGHTS_PROMPT.format(language=language, code=code))
         except Exception as e:
             return f"AI analysis failed: {str(e)}"
     
     def get_improvement_suggestions(self, code: str, language: str) -> str:
         """Get specific improvement suggestions"""
         
-        prompt = f"""Review this {language} code and suggest specific improvements:
-
-{code}
-
-Focus on:
-- Code structure and organization
-- Performance optimizations
-- Error handling
-- Readability improvements
-- Security considerations
-
-Provide concrete, actionable suggestions."""
-        
         try:
-            return self.assistant.generate_response(prompt)
+            return self._cached_generate(IMPROVEMENTS_PROMPT.format(language=language, code=code))
         except Exception as e:
             return f"Improvement analysis failed: {str(e)}"
     
     def generate_documentation(self, code: str, language: str) -> str:
         """Generate documentation for the code"""
         
-        prompt = f"""Generate comprehensive documentation for this {language} code:
-
-{code}
-
-Include:
-- Module/class/function descriptions
-- Parameter documentation
-- Return value descriptions
-- Usage examples
-- Any important notes or warnings
-
-Format as markdown."""
-        
         try:
-            return self.assistant.generate_response(prompt)
+            return self._cached_generate(DOCUMENTATION_PROMPT.format(language=language, code=code))
         except Exception as e:
             return f"Documentation generation failed: {str(e)}"
     
-    def scan_security_issues(self, code: str, language: str) -> List[str]:
+    def scan_security_issues(self, code: str, language: str, deep_analysis: bool = False) -> List[str]:
         """Scan for potential security issues"""
         
-        issues = []
-        
-        if language == 'python':
-            # Common Python security issues
-            security_patterns = [
-                ('eval', 'Use of eval() can be dangerous'),
-                ('exec', 'Use of exec() can be dangerous'),
-                ('os.system', 'Use of os.system() can be vulnerable to injection'),
-                ('subprocess.call', 'Check subprocess.call() for injection vulnerabilities'),
-                ('pickle.loads', 'Pickle deserialization can be dangerous'),
-                ('yaml.load', 'Use yaml.safe_load() instead of yaml.load()'),
-                ('shell=True', 'subprocess with shell=True can be vulnerable'),
-                ('input(', 'raw_input/input can be dangerous in Python 2'),
-            ]
-            
-            for pattern, message in security_patterns:
-                if pattern in code:
-                    issues.append(message)
+        matches = self._security_matches(code, language)
+        issues = self._pattern_security_issues(matches)
         
         # Add AI-powered security analysis
-        try:
-            ai_security_prompt = f"""Analyze this {language} code for security vulnerabilities:
-
-{code}
-
-Look for:
-- SQL injection risks
-- XSS vulnerabilities  
-- Command injection
-- Insecure random number generation
-- Hardcoded credentials
-- Unsafe file operations
-- Input validation issues
-
-List any security concerns found."""
-            
-            ai_security = self.assistant.generate_response(ai_security_prompt)
-            if "No security issues" not in ai_security:
-                issues.append(f"AI Security Analysis: {ai_security}")
-                
-        except Exception:
-            pass
+        source = self._ai_security_source(code, matches, deep_analysis)
+        if source is not None:
+            try:
+                ai_security = self._cached_generate(SECURITY_PROMPT.format(language=language, code=source))
+                if "No security issues" not in ai_security:
+                    issues.append(f"AI Security Analysis: {ai_security}")
+                    
+            except Exception:
+                pass
         
         return issues
     
+    def _security_matches(self, code: str, language: str) -> List[Tuple[int, str]]:
+        """Offsets and patterns of deterministic security hits"""
+        
+        if language != 'python':
+            return []
+        
+        # One pass over the source finds every pattern
+        return [(match.start(), match.group(1)) for match in _PYTHON_SECURITY_RE.finditer(code)]
+    
+    def _pattern_security_issues(self, matches: List[Tuple[int, str]]) -> List[str]:
+        """Messages for deterministic security hits, in table order"""
+        
+        found = {pattern for _, pattern in matches}
+        return [message for pattern, message in PYTHON_SECURITY_PATTERNS if pattern in found]
+    
+    def _ai_security_source(self, code: str, matches: List[Tuple[int, str]], deep_analysis: bool) -> Optional[str]:
+        """Code to send for AI security review, or None when it isn't worth a model call"""
+        
+        if not deep_analysis or (not matches and len(code) <= self.SECURITY_AI_MIN_CHARS):
+            return None
+        if not matches:
+            return code
+        
+        # Merge overlapping windows around the hits
+        windows = []
+        for offset, pattern in matches:
+            start = max(0, offset - self.SECURITY_SNIPPET_RADIUS)
+            end = min(len(code), offset + len(pattern) + self.SECURITY_SNIPPET_RADIUS)
+            if windows and start <= windows[-1][1]:
+                windows[-1][1] = max(windows[-1][1], end)
+            else:
+                windows.append([start, end])
+        
+        return "\n...\n".join(code[start:end] for start, end in windows[:self.SECURITY_SNIPPET_LIMIT])
+    
     def is_code_file(self, file_path: Path) -> bool:
         """Check if file is a code file"""
         
-        code_extensions = {
-            '.py', '.js', '.ts', '.java', '.cpp', '.c', '.cs', '.php', 
-            '.rb', '.go', '.rs', '.swift', '.kt', '.scala', '.html', 
-            '.css', '.sql', '.sh', '.r', '.m'
-        }
+        return self._is_code_file(file_path.name)
+    
+    def _is_code_file(self, name: str) -> bool:
+        """Check a file name's extension without building a Path"""
         
-        return file_path.suffix.lower() in code_extensions
+        # Same rule as Path.suffix: a leading or trailing dot is not an extension
+        dot = name.rfind('.')
+        return 0 < dot < len(name) - 1 and name[dot:].lower() in self._CODE_EXTS
+    
+    def _iter_code_files(self, root: Path):
+        """Yield (path, size) for code files under root using one scandir pass per directory"""
+        
+        stack = [str(root)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        # Like rglob, don't descend into symlinked directories
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif self._is_code_file(entry.name) and entry.is_file():
+                            yield Path(entry.path), entry.stat().st_size
+            except OSError:
+                continue
     
     def display_results(self, results: Dict[str, Any]):
         """Display analysis results (used by CLI)"""
@@ -324,5 +622,15 @@ List any security concerns found."""
             console.print(f"Files: {summary['total_files']} | Lines: {summary['total_lines']:,}")
             console.print(f"Languages: {', '.join(summary['languages'].keys())}")
             
+            if 'output_path' in results:
+                console.print(f"[dim]Per-file results written to {results['output_path']}[/dim]")
+            
+            if summary.get('skipped_files'):
+                console.print(f"[dim]Skipped {summary['skipped_files']} files larger than {self.max_analyze_bytes // 1024} KB[/dim]")
+            
             if summary['issues']:
-                console.print(f"\n[red]Issues found in {len(summary['issues'])} files[/red]") 
\ No newline at end of file
+                console.print(f"\n[red]Issues found in {len(summary['issues'])} files[/red]")
+        
+        # AI response cache usage
+        if self.cache_stats['cached']:
+            console.print(f"[dim]AI responses: {self.cache_stats['initial']} generated, {self.cache_stats['cached']} reused from cache[/dim]") 
\ No newline at end of file
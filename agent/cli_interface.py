@@ -2,28 +2,53 @@
 Enhanced CLI interface for the God-Tier Coding Agent
 """
 
+import heapq
+import os
+import time
 from pathlib import Path
 from typing import Optional
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
 from rich.panel import Panel
 from rich.table import Table
-from rich.syntax import Syntax
-from rich.markdown import Markdown
-from rich.progress import Progress, SpinnerColumn, TextColumn
 
-from .model import CodeAssistant
 from .memory import ConversationMemory
-from .analyzer import CodeAnalyzer
+from .code_tools import CODE_BLOCK_RE
+
+# The model layer (llama.cpp) and the heavier Rich renderers are imported on
+# first use, so the prompt comes up without paying for them
 
 class CLIInterface:
     """Enhanced CLI interface with advanced features"""
     
     def __init__(self, model_path: str, max_tokens: int = 1024, temperature: float = 0.7):
+        # Fail fast on a bad path; the weights themselves load on first use
+        if not Path(model_path).exists():
+            raise FileNotFoundError(f"Model file not found: {model_path}")
+        
         self.console = Console()
-        self.assistant = CodeAssistant(model_path, max_tokens, temperature)
+        self.model_path = model_path
+        self.max_tokens = max_tokens
+        self.temperature = temperature
         self.memory = ConversationMemory()
-        self.analyzer = CodeAnalyzer(model_path)
+        self._assistant = None
+        self._analyzer = None
+    
+    @property
+    def assistant(self):
+        """Code assistant, loading the model on first use"""
+        if self._assistant is None:
+            from .model import CodeAssistant
+            self._assistant = CodeAssistant.get(self.model_path, self.max_tokens, self.temperature)
+        return self._assistant
+    
+    @property
+    def analyzer(self):
+        """Code analyzer sharing the assistant's model"""
+        if self._analyzer is None:
+            from .analyzer import CodeAnalyzer
+            self._analyzer = CodeAnalyzer(self.assistant)
+        return self._analyzer
         
     def run_enhanced_chat(self):
         """Run the enhanced chat interface"""
@@ -80,31 +105,58 @@ class CLIInterface:
     
     def handle_chat_message(self, message: str):
         """Handle regular chat messages"""
-        with self.console.status("[bold green]🤖 AI is thinking..."):
-            response = self.assistant.generate_response(message, self.memory.get_context())
-            self.memory.add_exchange(message, response)
+        from rich.live import Live
+        from rich.markdown import Markdown
+        
+        # Load the model before the live view so its load messages aren't overdrawn
+        assistant = self.assistant
+        chunks = []
+        last_render = 0.0
+        
+        # Show text as it arrives; the preview is replaced by the formatted response
+        with Live(Markdown("🤖 *AI is thinking...*"), console=self.console, refresh_per_second=12, transient=True) as live:
+            for chunk in assistant.stream_response(message, self.memory.get_context()):
+                chunks.append(chunk)
+                # Re-parsing the Markdown per token is quadratic, so match the refresh rate
+                now = time.monotonic()
+                if now - last_render >= 1 / 12:
+                    live.update(Markdown("".join(chunks)))
+                    last_render = now
+        
+        response = "".join(chunks).strip()
+        self.memory.add_exchange(message, response)
         
         self.display_ai_response(response)
     
     def display_ai_response(self, response: str):
         """Display AI response with formatting"""
+        from rich.markdown import Markdown
+        from rich.syntax import Syntax
+        
         if "```" in response:
-            parts = response.split("```")
-            for i, part in enumerate(parts):
-                if i % 2 == 0 and part.strip():
-                    self.console.print(Markdown(part))
-                elif i % 2 == 1 and part.strip():
-                    lines = part.split('\n')
-                    language = lines[0].strip() if lines else "python"
-                    code = '\n'.join(lines[1:]) if len(lines) > 1 else part
-                    if code.strip():
-                        syntax = Syntax(code, language, theme="monokai")
-                        self.console.print(Panel(syntax, title=f"Code ({language})", border_style="green"))
+            # Prose between fenced blocks goes through Markdown, blocks get highlighted
+            pos = 0
+            for match in CODE_BLOCK_RE.finditer(response):
+                prose = response[pos:match.start()]
+                if prose.strip():
+                    self.console.print(Markdown(prose))
+                
+                language = match.group(1) or "python"
+                code = match.group(2)
+                if code.strip():
+                    syntax = Syntax(code, language, theme="monokai")
+                    self.console.print(Panel(syntax, title=f"Code ({language})", border_style="green"))
+                pos = match.end()
+            
+            if response[pos:].strip():
+                self.console.print(Markdown(response[pos:]))
         else:
             self.console.print(Panel(Markdown(response), title="🤖 AI Assistant", border_style="blue"))
     
     def analyze_file(self, file_path: Optional[str]):
         """Analyze a code file"""
+        from rich.progress import Progress, SpinnerColumn, TextColumn
+        
         if not file_path:
             file_path = Prompt.ask("Enter file path to analyze")
         
@@ -122,6 +174,8 @@ class CLIInterface:
     
     def display_analysis_results(self, results: dict, file_path: str):
         """Display analysis results"""
+        from rich.markdown import Markdown
+        
         table = Table(title=f"📊 Analysis: {file_path}")
         table.add_column("Metric", style="bold cyan")
         table.add_column("Value", style="green")
@@ -139,6 +193,8 @@ class CLIInterface:
     
     def generate_code(self, prompt: str):
         """Generate code from prompt"""
+        from rich.syntax import Syntax
+        
         if not prompt:
             prompt = Prompt.ask("What code would you like me to generate?")
         
@@ -158,14 +214,18 @@ class CLIInterface:
     def file_browser(self):
         """Simple file browser"""
         current_dir = Path.cwd()
-        files = list(current_dir.iterdir())
+        
+        # First 20 by name without sorting the whole directory; DirEntry caches
+        # the file type from the directory listing
+        with os.scandir(current_dir) as entries:
+            files = heapq.nsmallest(20, entries, key=lambda entry: entry.name)
         
         table = Table(title=f"📁 Files in {current_dir.name}")
         table.add_column("Name", style="cyan")
         table.add_column("Type", style="green")
         table.add_column("Size", style="yellow")
         
-        for item in sorted(files)[:20]:  # Limit to 20 items
+        for item in files:
             if item.is_dir():
                 table.add_row(f"📁 {item.name}", "Directory", "-")
             else:
@@ -2,38 +2,119 @@
 Code analysis and utility tools.
 """
 
+import os
 import re
 import ast
+from collections import deque
+from dataclasses import dataclass
 from typing import List, Dict, Optional, Tuple
-from pathlib import Path
+
+# File extension -> language name
+_EXT_LANG = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.java': 'java',
+    '.cpp': 'cpp',
+    '.c': 'c',
+    '.cs': 'csharp',
+    '.php': 'php',
+    '.rb': 'ruby',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.swift': 'swift',
+    '.kt': 'kotlin',
+    '.scala': 'scala',
+    '.html': 'html',
+    '.css': 'css',
+    '.sql': 'sql',
+    '.sh': 'bash',
+    '.r': 'r',
+    '.m': 'matlab'
+}
+
+# ES module imports and CommonJS requires, matched in one pass in source order
+_JS_IMPORT_RE = re.compile(
+    r'import\s+.*?from\s+[\'"][^\'"]+[\'"];?'
+    r'|(?:const|let|var)\s+.*?=\s+require\s*\([\'"][^\'"]+[\'"]\);?',
+    re.MULTILINE
+)
+
+# Fenced markdown code blocks with an optional language tag
+CODE_BLOCK_RE = re.compile(r'```(\w+)?\n(.*?)```', re.DOTALL)
+
+# Precomputed indentation strings for the formatting heuristic
+_INDENTS = tuple('    ' * i for i in range(32))
+
+def _indent(level: int) -> str:
+    return _INDENTS[level] if level < len(_INDENTS) else '    ' * level
+
+# Fields that hold statement lists (and the handler/case nodes wrapping them)
+_BODY_FIELDS = frozenset({'body', 'orelse', 'finalbody', 'handlers', 'cases'})
+
+def _walk_statements(tree: ast.AST):
+    """
+    Yield statement nodes in the same order as ast.walk.
+    
+    Imports and function definitions are statements, and statements never
+    appear inside expressions, so expression subtrees are never entered.
+    """
+    todo = deque([tree])
+    while todo:
+        node = todo.popleft()
+        for field in node._fields:
+            if field in _BODY_FIELDS:
+                value = getattr(node, field, None)
+                if isinstance(value, list):
+                    todo.extend(value)
+        yield node
+
+def _parse(code: str) -> Tuple[Optional[ast.Module], Optional[str]]:
+    """Parse Python source; returns (tree, syntax_error)."""
+    try:
+        return ast.parse(code), None
+    except SyntaxError as e:
+        return None, str(e)
+
+def _unparse_python(code: str) -> Optional[str]:
+    """Re-emit valid Python through the AST unparser, or None if it can't be used."""
+    # ast.unparse is 3.9+ and drops comments, so only use it where nothing is lost
+    if not hasattr(ast, 'unparse') or '#' in code:
+        return None
+    try:
+        return ast.unparse(ast.parse(code))
+    except (SyntaxError, ValueError):
+        return None
+
+@dataclass
+class CodeFacts:
+    """Line split and parse tree of a source string, computed once and shared."""
+    
+    source: str
+    lines: List[str]
+    tree: Optional[ast.Module] = None
+    syntax_error: Optional[str] = None
+    
+    @classmethod
+    def from_source(cls, code: str, language: str = 'python') -> 'CodeFacts':
+        """
+        Split and (for Python) parse a source string.
+        
+        Args:
+            code: Source code
+            language: Programming language
+            
+        Returns:
+            Facts to pass to the CodeTools helpers
+        """
+        facts = cls(source=code, lines=code.split('\n'))
+        if language == 'python':
+            facts.tree, facts.syntax_error = _parse(code)
+        return facts
 
 class CodeTools:
     """Utility class for code analysis and processing."""
     
-    def __init__(self):
-        self.language_extensions = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.ts': 'typescript',
-            '.java': 'java',
-            '.cpp': 'cpp',
-            '.c': 'c',
-            '.cs': 'csharp',
-            '.php': 'php',
-            '.rb': 'ruby',
-            '.go': 'go',
-            '.rs': 'rust',
-            '.swift': 'swift',
-            '.kt': 'kotlin',
-            '.scala': 'scala',
-            '.html': 'html',
-            '.css': 'css',
-            '.sql': 'sql',
-            '.sh': 'bash',
-            '.r': 'r',
-            '.m': 'matlab'
-        }
-    
     def detect_language(self, file_path: str) -> str:
         """
         Detect programming language from file extension.
@@ -44,33 +125,47 @@ class CodeTools:
         Returns:
             Detected language
         """
-        ext = Path(file_path).suffix.lower()
-        return self.language_extensions.get(ext, 'text')
+        # Same rule as Path.suffix, without building a Path
+        name = os.path.basename(file_path)
+        dot = name.rfind('.')
+        if 0 < dot < len(name) - 1:
+            return _EXT_LANG.get(name[dot:].lower(), 'text')
+        return 'text'
+    
+    def _parse_python(self, code: str, facts: Optional[CodeFacts] = None) -> ast.Module:
+        """Parse Python source, reusing the tree from precomputed facts."""
+        if facts is not None:
+            if facts.tree is not None:
+                return facts.tree
+            if facts.syntax_error is not None:
+                raise SyntaxError(facts.syntax_error)
+        return ast.parse(code)
     
-    def extract_imports(self, code: str, language: str = 'python') -> List[str]:
+    def extract_imports(self, code: str, language: str = 'python', facts: Optional[CodeFacts] = None) -> List[str]:
         """
         Extract import statements from code.
         
         Args:
             code: Source code
             language: Programming language
+            facts: Optional precomputed facts for the same source
             
         Returns:
             List of import statements
         """
         if language == 'python':
-            return self._extract_python_imports(code)
+            return self._extract_python_imports(code, facts)
         elif language in ['javascript', 'typescript']:
             return self._extract_js_imports(code)
         else:
             return []
     
-    def _extract_python_imports(self, code: str) -> List[str]:
+    def _extract_python_imports(self, code: str, facts: Optional[CodeFacts] = None) -> List[str]:
         """Extract Python import statements."""
         imports = []
         try:
-            tree = ast.parse(code)
-            for node in ast.walk(tree):
+            tree = self._parse_python(code, facts)
+            for node in _walk_statements(tree):
                 if isinstance(node, (ast.Import, ast.ImportFrom)):
                     if isinstance(node, ast.Import):
                         for alias in node.names:
@@ -82,7 +177,8 @@ class CodeTools:
         except SyntaxError:
             # Fallback to regex for invalid syntax
             import_pattern = r'^(?:from\s+(\w+(?:\.\w+)*)\s+import\s+(.+)|import\s+(.+))'
-            for line in code.split('\n'):
+            lines = facts.lines if facts is not None else code.split('\n')
+            for line in lines:
                 match = re.match(import_pattern, line.strip())
                 if match:
                     imports.append(line.strip())
@@ -90,43 +186,31 @@ class CodeTools:
     
     def _extract_js_imports(self, code: str) -> List[str]:
         """Extract JavaScript/TypeScript import statements."""
-        imports = []
-        import_patterns = [
-            r'import\s+.*?from\s+[\'"][^\'"]+[\'"];?',
-            r'import\s+.*?;?',
-            r'const\s+.*?=\s+require\s*\([\'"][^\'"]+[\'"]\);?',
-            r'let\s+.*?=\s+require\s*\([\'"][^\'"]+[\'"]\);?',
-            r'var\s+.*?=\s+require\s*\([\'"][^\'"]+[\'"]\);?'
-        ]
-        
-        for pattern in import_patterns:
-            matches = re.findall(pattern, code, re.MULTILINE)
-            imports.extend(matches)
-        
-        return imports
+        return _JS_IMPORT_RE.findall(code)
     
-    def find_functions(self, code: str, language: str = 'python') -> List[Dict]:
+    def find_functions(self, code: str, language: str = 'python', facts: Optional[CodeFacts] = None) -> List[Dict]:
         """
         Find function definitions in code.
         
         Args:
             code: Source code
             language: Programming language
+            facts: Optional precomputed facts for the same source
             
         Returns:
             List of function information
         """
         if language == 'python':
-            return self._find_python_functions(code)
+            return self._find_python_functions(code, facts)
         else:
             return []
     
-    def _find_python_functions(self, code: str) -> List[Dict]:
+    def _find_python_functions(self, code: str, facts: Optional[CodeFacts] = None) -> List[Dict]:
         """Find Python function definitions."""
         functions = []
         try:
-            tree = ast.parse(code)
-            for node in ast.walk(tree):
+            tree = self._parse_python(code, facts)
+            for node in _walk_statements(tree):
                 if isinstance(node, ast.FunctionDef):
                     functions.append({
                         'name': node.name,
@@ -137,7 +221,8 @@ class CodeTools:
         except SyntaxError:
             # Fallback to regex for invalid syntax
             func_pattern = r'def\s+(\w+)\s*\(([^)]*)\):'
-            for i, line in enumerate(code.split('\n'), 1):
+            lines = facts.lines if facts is not None else code.split('\n')
+            for i, line in enumerate(lines, 1):
                 match = re.match(func_pattern, line.strip())
                 if match:
                     functions.append({
@@ -148,26 +233,27 @@ class CodeTools:
                     })
         return functions
     
-    def validate_syntax(self, code: str, language: str = 'python') -> Tuple[bool, Optional[str]]:
+    def validate_syntax(self, code: str, language: str = 'python', facts: Optional[CodeFacts] = None) -> Tuple[bool, Optional[str]]:
         """
         Validate code syntax.
         
         Args:
             code: Source code
             language: Programming language
+            facts: Optional precomputed facts for the same source
             
         Returns:
             Tuple of (is_valid, error_message)
         """
         if language == 'python':
-            return self._validate_python_syntax(code)
+            return self._validate_python_syntax(code, facts)
         else:
             return True, None
     
-    def _validate_python_syntax(self, code: str) -> Tuple[bool, Optional[str]]:
+    def _validate_python_syntax(self, code: str, facts: Optional[CodeFacts] = None) -> Tuple[bool, Optional[str]]:
         """Validate Python syntax."""
         try:
-            ast.parse(code)
+            self._parse_python(code, facts)
             return True, None
         except SyntaxError as e:
             return False, str(e)
@@ -190,9 +276,15 @@ class CodeTools:
     
     def _format_python_code(self, code: str) -> str:
         """Basic Python code formatting."""
+        unparsed = _unparse_python(code)
+        if unparsed is not None:
+            return unparsed
+        
+        # Indentation heuristic for invalid or commented code
         lines = code.split('\n')
         formatted_lines = []
         indent_level = 0
+        indent = ''
         
         for line in lines:
             stripped = line.strip()
@@ -202,16 +294,18 @@ class CodeTools:
             
             # Handle indentation
             if stripped.endswith(':'):
-                formatted_lines.append('    ' * indent_level + stripped)
+                formatted_lines.append(indent + stripped)
                 indent_level += 1
+                indent = _indent(indent_level)
             elif stripped in ['pass', 'break', 'continue', 'return']:
-                formatted_lines.append('    ' * indent_level + stripped)
+                formatted_lines.append(indent + stripped)
             elif stripped.startswith(('if ', 'elif ', 'else:', 'for ', 'while ', 'try:', 'except', 'finally:', 'with ', 'def ', 'class ')):
-                formatted_lines.append('    ' * indent_level + stripped)
+                formatted_lines.append(indent + stripped)
                 if stripped.endswith(':'):
                     indent_level += 1
+                    indent = _indent(indent_level)
             else:
-                formatted_lines.append('    ' * indent_level + stripped)
+                formatted_lines.append(indent + stripped)
         
         return '\n'.join(formatted_lines)
     
@@ -226,8 +320,7 @@ class CodeTools:
             List of code blocks
         """
         # Match code blocks with language specification
-        pattern = r'```(\w+)?\n(.*?)```'
-        matches = re.findall(pattern, text, re.DOTALL)
+        matches = CODE_BLOCK_RE.findall(text)
         
         code_blocks = []
         for lang, code in matches:
@@ -235,23 +328,34 @@ class CodeTools:
         
         return code_blocks
     
-    def estimate_complexity(self, code: str, language: str = 'python') -> Dict:
+    def estimate_complexity(self, code: str, language: str = 'python', facts: Optional[CodeFacts] = None) -> Dict:
         """
         Estimate code complexity metrics.
         
         Args:
             code: Source code
             language: Programming language
+            facts: Optional precomputed facts for the same source
             
         Returns:
             Complexity metrics
         """
-        lines = code.split('\n')
+        lines = facts.lines if facts is not None else code.split('\n')
         total_lines = len(lines)
-        code_lines = len([line for line in lines if line.strip() and not line.strip().startswith('#')])
-        comment_lines = len([line for line in lines if line.strip().startswith('#')])
+        code_lines = 0
+        comment_lines = 0
+        
+        # Classify each line once instead of building intermediate lists; only the
+        # leading whitespace matters, so don't pay for stripping the tail too
+        for line in lines:
+            stripped = line.lstrip()
+            if stripped:
+                if stripped[0] == '#':
+                    comment_lines += 1
+                else:
+                    code_lines += 1
         
-        functions = self.find_functions(code, language)
+        functions = self.find_functions(code, language, facts)
         
         return {
             'total_lines': total_lines,
@@ -0,0 +1,11 @@
+"""
+GGUF model file helpers shared by the model loader and the setup wizard.
+"""
+
+import re
+
+# GGUF general.file_type values for unquantized weights (F32, F16, BF16)
+UNQUANTIZED_FILE_TYPES = {0: "F32", 1: "F16", 32: "BF16"}
+
+# Precision tag in the file name of an unquantized model, e.g. model-f16.gguf
+UNQUANTIZED_NAME_RE = re.compile(r'(?<![a-z0-9])(b?f16|fp16|f32|fp32)(?![a-z0-9])', re.IGNORECASE)
@@ -2,27 +2,109 @@
 Conversation memory and context management.
 """
 
+import hashlib
 import json
+import mmap
+import os
 import time
-from typing import List, Dict, Optional
+from collections import deque
+from itertools import islice
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib json module
+    orjson = None
+
+# File suffixes read as one JSON exchange per line
+JOURNAL_SUFFIXES = ('.jsonl', '.ndjson')
+
+# Files at least this large are parsed from a memory map instead of a copy
+MMAP_MIN_BYTES = 1024 * 1024
+
+def _dump_json(data, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+def _load_json(data: bytes):
+    """Parse UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _load_json_file(path) -> object:
+    """Parse a JSON file from its raw bytes, mapping large files instead of copying them."""
+    with open(path, 'rb') as f:
+        if orjson is None or os.fstat(f.fileno()).st_size < MMAP_MIN_BYTES:
+            return _load_json(f.read())
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                return orjson.loads(view)
+            finally:
+                view.release()
+
 class ConversationMemory:
     """Manages conversation history and context."""
     
-    def __init__(self, max_history: int = 10, save_path: Optional[str] = None):
+    # Semantic search: sentence-transformers model and minimum cosine similarity
+    EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+    SIMILARITY_THRESHOLD = 0.4
+    EMBED_BATCH_SIZE = 32
+    # Flat float32 rows give way to 8-bit scalar quantization once the index holds
+    # this many rows, then to an HNSW graph over quantized rows (logarithmic search).
+    # Compaction caps the index at twice max_history rows, so each needs a
+    # max_history of at least half its threshold
+    QUANTIZE_MIN_ROWS = 1000
+    HNSW_MIN_ROWS = 2000
+    # Compaction rebuilds the graph, so build it with faiss's default effort
+    HNSW_EF_CONSTRUCTION = 40
+    HNSW_EF_SEARCH = 64
+    
+    def __init__(
+        self,
+        max_history: int = 10,
+        save_path: Optional[str] = None,
+        semantic_search: bool = False,
+        embedding_cache_dir: Optional[str] = None,
+        journal_path: Optional[str] = None
+    ):
         """
         Initialize conversation memory.
         
         Args:
             max_history: Maximum number of exchanges to keep in memory
             save_path: Optional path to save conversation history
+            semantic_search: Search history by embedding similarity (needs faiss and sentence-transformers)
+            embedding_cache_dir: Optional directory for cached exchange embeddings
+            journal_path: Optional NDJSON file each exchange is appended to as it happens
         """
         self.max_history = max_history
         self.save_path = save_path
+        self.journal_path = journal_path
         self.conversations: List[Dict] = []
-        self.current_session: List[Dict] = []
+        # Bounded ring buffer: appending past max_history evicts the oldest exchange
+        self.current_session: "deque[Dict]" = deque(maxlen=max_history)
+        
+        # Running character totals over current_session for get_statistics
+        self._user_chars = 0
+        self._assistant_chars = 0
+        
+        # Lowercased (user, assistant) per exchange for substring search, built on first search
+        self._lowercase: "Optional[deque[Tuple[str, str]]]" = None
+        
+        # Semantic index, loaded on first use; rows of the index map to _indexed
+        self.semantic_search = semantic_search
+        self.embedding_cache_dir = Path(embedding_cache_dir) if embedding_cache_dir else None
+        self._encoder = None
+        self._index = None
+        self._indexed: List[Dict] = []
+        self._pending: List[Dict] = []
         
         if save_path:
             self._load_history()
@@ -35,17 +117,41 @@ class ConversationMemory:
             user_input: User's message
             assistant_response: Assistant's response
         """
+        # One clock read; the integer form makes durations a subtraction
+        now_ns = time.time_ns()
         exchange = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': datetime.fromtimestamp(now_ns / 1e9).isoformat(),
+            'ts_ns': now_ns,
             'user': user_input,
             'assistant': assistant_response
         }
         
+        # Account for the exchange the bounded deque is about to evict
+        if len(self.current_session) == self.max_history:
+            dropped = self.current_session[0]
+            self._user_chars -= len(dropped['user'])
+            self._assistant_chars -= len(dropped['assistant'])
+        
         self.current_session.append(exchange)
+        self._user_chars += len(user_input)
+        self._assistant_chars += len(assistant_response)
+        if self._lowercase is not None:
+            self._lowercase.append((user_input.lower(), assistant_response.lower()))
+        
+        # Appending one line keeps incremental saves O(1) per exchange
+        if self.journal_path:
+            try:
+                with open(self.journal_path, 'ab') as f:
+                    f.write(_dump_json(exchange) + b'\n')
+            except Exception as e:
+                print(f"Failed to append to conversation journal: {e}")
         
-        # Keep only the most recent exchanges
-        if len(self.current_session) > self.max_history:
-            self.current_session = self.current_session[-self.max_history:]
+        # The index is built on the first semantic search; after that new exchanges
+        # are encoded in batches, at the latest when the next search needs them
+        if self._index is not None:
+            self._pending.append(exchange)
+            if len(self._pending) >= self.EMBED_BATCH_SIZE:
+                self._flush_embeddings()
     
     def get_context(self, num_exchanges: int = 3) -> str:
         """
@@ -61,7 +167,7 @@ class ConversationMemory:
             return ""
         
         # Get the most recent exchanges
-        recent_exchanges = self.current_session[-num_exchanges:]
+        recent_exchanges = islice(self.current_session, max(len(self.current_session) - num_exchanges, 0), None)
         
         context_parts = []
         for exchange in recent_exchanges:
@@ -77,7 +183,7 @@ class ConversationMemory:
         Returns:
             List of all exchanges in current session
         """
-        return self.current_session.copy()
+        return list(self.current_session)
     
     def clear_session(self) -> None:
         """Clear the current conversation session."""
@@ -90,7 +196,9 @@ class ConversationMemory:
             }
             self.conversations.append(session_summary)
             
-            self.current_session = []
+            self.current_session.clear()
+            self._rebuild_session_caches()
+            self._reset_index()
     
     def save_conversation(self, file_path: Optional[str] = None) -> None:
         """
@@ -110,7 +218,7 @@ class ConversationMemory:
         
         conversation_data = {
             'timestamp': datetime.now().isoformat(),
-            'exchanges': self.current_session,
+            'exchanges': list(self.current_session),
             'summary': {
                 'total_exchanges': len(self.current_session),
                 'session_duration': self._calculate_session_duration()
@@ -118,8 +226,8 @@ class ConversationMemory:
         }
         
         try:
-            with open(save_path, 'w', encoding='utf-8') as f:
-                json.dump(conversation_data, f, indent=2, ensure_ascii=False)
+            with open(save_path, 'wb') as f:
+                f.write(_dump_json(conversation_data, indent=True))
         except Exception as e:
             print(f"Failed to save conversation: {e}")
     
@@ -127,6 +235,9 @@ class ConversationMemory:
         """
         Load conversation from file.
         
+        Accepts a document written by save_conversation or a journal with one
+        exchange per line (.jsonl/.ndjson).
+        
         Args:
             file_path: Path to conversation file
             
@@ -134,11 +245,18 @@ class ConversationMemory:
             True if loaded successfully, False otherwise
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            if Path(file_path).suffix.lower() in JOURNAL_SUFFIXES:
+                with open(file_path, 'rb') as f:
+                    data = {'exchanges': [_load_json(line) for line in f if line.strip()]}
+            else:
+                data = _load_json_file(file_path)
             
             if 'exchanges' in data:
-                self.current_session = data['exchanges']
+                self.current_session = deque(data['exchanges'], maxlen=self.max_history)
+                self._rebuild_session_caches()
+                self._reset_index()
+                if self._index is not None:
+                    self._index_exchanges(self.current_session)
                 return True
             return False
         except Exception as e:
@@ -151,8 +269,7 @@ class ConversationMemory:
             return
         
         try:
-            with open(self.save_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = _load_json_file(self.save_path)
             
             if isinstance(data, list):
                 self.conversations = data
@@ -172,8 +289,8 @@ class ConversationMemory:
                 'last_updated': datetime.now().isoformat()
             }
             
-            with open(self.save_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with open(self.save_path, 'wb') as f:
+                f.write(_dump_json(data, indent=True))
         except Exception as e:
             print(f"Failed to save conversation history: {e}")
     
@@ -182,13 +299,18 @@ class ConversationMemory:
         if len(self.current_session) < 2:
             return None
         
+        first, last = self.current_session[0], self.current_session[-1]
+        
         try:
-            start_time = datetime.fromisoformat(self.current_session[0]['timestamp'])
-            end_time = datetime.fromisoformat(self.current_session[-1]['timestamp'])
-            duration = end_time - start_time
+            if 'ts_ns' in first and 'ts_ns' in last:
+                total_seconds = (last['ts_ns'] - first['ts_ns']) // 1_000_000_000
+            else:
+                # Exchanges loaded from files written before ts_ns existed
+                start_time = datetime.fromisoformat(first['timestamp'])
+                end_time = datetime.fromisoformat(last['timestamp'])
+                total_seconds = int((end_time - start_time).total_seconds())
             
             # Format duration
-            total_seconds = int(duration.total_seconds())
             minutes = total_seconds // 60
             seconds = total_seconds % 60
             
@@ -199,6 +321,12 @@ class ConversationMemory:
         except Exception:
             return None
     
+    def _rebuild_session_caches(self) -> None:
+        """Recompute per-session totals and drop derived caches after replacing the session."""
+        self._user_chars = sum(len(exchange['user']) for exchange in self.current_session)
+        self._assistant_chars = sum(len(exchange['assistant']) for exchange in self.current_session)
+        self._lowercase = None
+    
     def get_statistics(self) -> Dict:
         """
         Get conversation statistics.
@@ -207,8 +335,8 @@ class ConversationMemory:
             Dictionary with conversation statistics
         """
         total_exchanges = len(self.current_session)
-        total_user_chars = sum(len(exchange['user']) for exchange in self.current_session)
-        total_assistant_chars = sum(len(exchange['assistant']) for exchange in self.current_session)
+        total_user_chars = self._user_chars
+        total_assistant_chars = self._assistant_chars
         
         return {
             'total_exchanges': total_exchanges,
@@ -219,12 +347,17 @@ class ConversationMemory:
             'session_duration': self._calculate_session_duration()
         }
     
-    def search_history(self, query: str) -> List[Dict]:
+    def search_history(self, query: str, top_k: int = 5) -> List[Dict]:
         """
         Search through conversation history.
         
+        With semantic search enabled, returns up to top_k exchanges whose
+        embedding is similar to the query, best match first. Otherwise falls
+        back to a case-insensitive substring match.
+        
         Args:
             query: Search query
+            top_k: Maximum number of semantic matches
             
         Returns:
             List of matching exchanges
@@ -232,12 +365,175 @@ class ConversationMemory:
         if not query.strip():
             return []
         
+        if self._semantic_backend():
+            self._flush_embeddings()
+            if self._index.ntotal:
+                return self._semantic_matches(query, top_k)
+        
+        if self._lowercase is None:
+            self._lowercase = deque(
+                ((e['user'].lower(), e['assistant'].lower()) for e in self.current_session),
+                maxlen=self.max_history
+            )
+        
         query_lower = query.lower()
         matches = []
         
-        for exchange in self.current_session:
-            if (query_lower in exchange['user'].lower() or 
-                query_lower in exchange['assistant'].lower()):
+        for exchange, (user_lower, assistant_lower) in zip(self.current_session, self._lowercase):
+            if query_lower in user_lower or query_lower in assistant_lower:
                 matches.append(exchange)
         
-        return matches 
\ No newline at end of file
+        return matches 
+    
+    def _semantic_backend(self) -> bool:
+        """Load the encoder and index on first use; False when semantic search is off or unavailable."""
+        if not self.semantic_search:
+            return False
+        
+        if self._index is None:
+            try:
+                import faiss
+                from sentence_transformers import SentenceTransformer
+                
+                self._encoder = SentenceTransformer(self.EMBEDDING_MODEL)
+                # Inner product over L2-normalized vectors is cosine similarity
+                self._index = faiss.IndexFlatIP(self._encoder.get_sentence_embedding_dimension())
+            except Exception as e:
+                print(f"Semantic search unavailable, using substring search: {e}")
+                self.semantic_search = False
+                return False
+            
+            self._index_exchanges(self.current_session)
+        
+        return True
+    
+    def _embedding_cache_path(self, text: str) -> Optional[Path]:
+        """Location of the cached embedding for a text, if caching is enabled."""
+        if not self.embedding_cache_dir:
+            return None
+        
+        digest = hashlib.sha256(f"{self.EMBEDDING_MODEL}\0{text}".encode('utf-8')).hexdigest()
+        return self.embedding_cache_dir / f"{digest}.npy"
+    
+    def _embed(self, texts: List[str]):
+        """Encode texts as normalized float32 rows, reusing cached embeddings."""
+        import numpy as np
+        
+        vectors = [None] * len(texts)
+        missing = []
+        
+        for i, text in enumerate(texts):
+            cache_path = self._embedding_cache_path(text)
+            if cache_path is not None and cache_path.exists():
+                vectors[i] = np.load(cache_path)
+            else:
+                missing.append(i)
+        
+        if missing:
+            encoded = self._encoder.encode(
+                [texts[i] for i in missing],
+                batch_size=self.EMBED_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+                cache_path = self._embedding_cache_path(texts[i])
+                if cache_path is not None:
+                    cache_path.parent.mkdir(parents=True, exist_ok=True)
+                    np.save(cache_path, vector)
+        
+        return np.ascontiguousarray(np.stack(vectors), dtype=np.float32)
+    
+    @staticmethod
+    def _exchange_text(exchange: Dict) -> str:
+        """Text embedded for an exchange."""
+        return f"{exchange['user']}\n{exchange['assistant']}"
+    
+    def _index_exchanges(self, exchanges: List[Dict]) -> None:
+        """Add exchanges to the semantic index."""
+        if not exchanges:
+            return
+        
+        self._index.add(self._embed([self._exchange_text(e) for e in exchanges]))
+        self._indexed.extend(exchanges)
+        
+        # Drop rows for exchanges that fell out of the session
+        if len(self._indexed) > 2 * self.max_history:
+            self._compact_index()
+        
+        self._upgrade_index()
+    
+    def _flush_embeddings(self) -> None:
+        """Encode pending exchanges that are still in the session in one batch."""
+        if not self._pending:
+            return
+        
+        live = {id(exchange) for exchange in self.current_session}
+        pending = [exchange for exchange in self._pending if id(exchange) in live]
+        self._pending = []
+        self._index_exchanges(pending)
+    
+    def _compact_index(self) -> None:
+        """Rebuild the index from the rows that are still in the current session."""
+        live = {id(exchange) for exchange in self.current_session}
+        keep = [row for row, exchange in enumerate(self._indexed) if id(exchange) in live]
+        
+        # Reset keeps a quantizer's training, so re-adding decoded rows encodes them unchanged
+        vectors = self._index.reconstruct_n(0, self._index.ntotal)[keep]
+        self._index.reset()
+        self._index.add(vectors)
+        self._indexed = [self._indexed[row] for row in keep]
+    
+    def _upgrade_index(self) -> None:
+        """Move the index to a cheaper structure once it has grown past a threshold."""
+        import faiss
+        
+        ntotal = self._index.ntotal
+        if ntotal >= self.HNSW_MIN_ROWS and not isinstance(self._index, faiss.IndexHNSW):
+            index = faiss.IndexHNSWSQ(self._index.d, faiss.ScalarQuantizer.QT_8bit, 32, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.HNSW_EF_CONSTRUCTION
+            index.hnsw.efSearch = self.HNSW_EF_SEARCH
+        elif ntotal >= self.QUANTIZE_MIN_ROWS and isinstance(self._index, faiss.IndexFlat):
+            index = faiss.IndexScalarQuantizer(self._index.d, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+        else:
+            return
+        
+        # Rows decoded from a quantized index would be quantized a second time,
+        # so those are embedded again (from the embedding cache when enabled)
+        if isinstance(self._index, faiss.IndexFlat):
+            vectors = self._index.reconstruct_n(0, ntotal)
+        else:
+            vectors = self._embed([self._exchange_text(e) for e in self._indexed])
+        index.train(vectors)
+        index.add(vectors)
+        self._index = index
+    
+    def _reset_index(self) -> None:
+        """Empty the semantic index."""
+        if self._index is not None:
+            self._index.reset()
+        self._indexed = []
+        self._pending = []
+    
+    def _semantic_matches(self, query: str, top_k: int) -> List[Dict]:
+        """Exchanges most similar to the query, above the similarity threshold."""
+        query_vector = self._encoder.encode(
+            [query],
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype('float32')
+        
+        # Ask for enough neighbours that top_k survive dropping evicted rows
+        live = {id(exchange) for exchange in self.current_session}
+        evicted = sum(1 for exchange in self._indexed if id(exchange) not in live)
+        scores, rows = self._index.search(query_vector, min(self._index.ntotal, top_k + evicted))
+        
+        matches = []
+        for score, row in zip(scores[0], rows[0]):
+            if score < self.SIMILARITY_THRESHOLD or len(matches) >= top_k:
+                break
+            if row >= 0 and id(self._indexed[row]) in live:
+                matches.append(self._indexed[row])
+        
+        return matches
@@ -2,22 +2,114 @@
 Model module for loading and using local LLM.
 """
 
+import asyncio
 import os
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Optional, List
-from llama_cpp import Llama
+from typing import Any, Callable, Dict, Optional, List, Iterator, Tuple
+import llama_cpp
+from llama_cpp import Llama, LlamaRAMCache
 from .code_tools import CodeTools
+from .gguf import UNQUANTIZED_FILE_TYPES, UNQUANTIZED_NAME_RE
+
+# Opening fence line and a closing fence on the last line of generated code
+_FENCE_OPEN_RE = re.compile(r'```[^\n]*\n?')
+_FENCE_CLOSE_RE = re.compile(r'(?:\A|\n)[^\S\n]*```[^\S\n]*\Z')
+
+# llama.cpp system-info feature names and the /proc/cpuinfo flags that provide them
+CPU_FEATURE_FLAGS = {
+    "AVX2": "avx2",
+    "AVX512": "avx512f",
+    "AVX512_VNNI": "avx512_vnni",
+    "AVX512_BF16": "avx512_bf16",
+    "AMX_INT8": "amx_int8",
+}
+_SYSTEM_INFO_RE = re.compile(r'(\w+) = (\d)')
+
+def missing_cpu_features() -> List[str]:
+    """
+    Find SIMD extensions the CPU has but the llama.cpp build doesn't use.
+    
+    Returns:
+        llama.cpp feature names (e.g. "AVX512_VNNI") compiled out of this build
+        although /proc/cpuinfo reports them; empty when unknown
+    """
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    cpu_flags = set(line.split(":", 1)[1].split())
+                    break
+            else:
+                return []
+    except OSError:
+        return []
+    
+    info = llama_cpp.llama_print_system_info()
+    if isinstance(info, bytes):
+        info = info.decode("utf-8", "replace")
+    built = dict(_SYSTEM_INFO_RE.findall(info))
+    
+    return [
+        feature for feature, flag in CPU_FEATURE_FLAGS.items()
+        if built.get(feature) == "0" and flag in cpu_flags
+    ]
 
 class CodeAssistant:
     """Main assistant class that handles model loading and text generation."""
     
+    # Live instances by constructor arguments, shared through CodeAssistant.get()
+    _instances: "weakref.WeakValueDictionary[Tuple, CodeAssistant]" = weakref.WeakValueDictionary()
+    _instances_lock = threading.Lock()
+    
+    GENERAL_SYSTEM_PROMPT = """You are a helpful coding assistant. Provide clear, concise, and accurate responses.
+Focus on practical solutions and best practices. If you're not sure about something, say so."""
+    
+    CODE_SYSTEM_PROMPT = """You are a coding assistant. Generate clean, well-documented code.
+Always include necessary imports and follow best practices.
+If the language isn't specified, assume Python."""
+    
+    EXPLAIN_SYSTEM_PROMPT = """You are a coding assistant. Explain the provided {language} code clearly and concisely.
+Focus on what the code does, how it works, and any important patterns or concepts."""
+    
+    DEBUG_SYSTEM_PROMPT = """You are a debugging assistant. Analyze the provided {language} code and identify issues.
+Provide specific fixes and explanations. If an error message is provided, focus on that specific issue."""
+    
+    STOP_SEQUENCES = ["</s>", "Human:", "Assistant:"]
+    
+    # Most queued async requests taken into one batch
+    BATCH_SIZE = 8
+    
+    # Tokenized system prompts kept per instance (explain/debug vary by language)
+    SYSTEM_TOKEN_CACHE_SIZE = 32
+    
+    # Default size of the in-memory store of evaluated prompt states
+    PROMPT_CACHE_BYTES = 512 << 20
+    
     def __init__(
         self,
         model_path: str,
         max_tokens: int = 512,
         temperature: float = 0.7,
         n_ctx: int = 2048,
-        n_threads: Optional[int] = None
+        n_threads: Optional[int] = None,
+        n_threads_batch: Optional[int] = None,
+        n_gpu_layers: int = -1,
+        tensor_split: Optional[List[float]] = None,
+        main_gpu: int = 0,
+        split_mode: Optional[int] = None,
+        prompt_cache_bytes: int = PROMPT_CACHE_BYTES,
+        use_mmap: bool = True,
+        use_mlock: bool = False,
+        numa: bool = False,
+        offload_kqv: bool = True,
+        n_batch: int = 1024,
+        n_ubatch: int = 512
     ):
         """
         Initialize the code assistant with a local LLM.
@@ -27,23 +119,98 @@ class CodeAssistant:
             max_tokens: Maximum tokens to generate
             temperature: Sampling temperature
             n_ctx: Context window size
-            n_threads: Number of CPU threads (None for auto)
+            n_threads: Number of CPU threads (None for one per physical core)
+            n_threads_batch: Threads for prompt prefill (None to match n_threads)
+            n_gpu_layers: Layers to offload to the GPU (-1 for all, 0 for CPU only).
+                Needs a GPU build of llama-cpp-python, e.g.
+                CMAKE_ARGS="-DGGML_CUDA=on" pip install llama-cpp-python;
+                CPU-only builds ignore it
+            tensor_split: Fraction of the offloaded layers to put on each GPU
+            main_gpu: GPU used for scratch buffers and small tensors
+            split_mode: llama_cpp.LLAMA_SPLIT_MODE_* value for multi-GPU setups
+                (None keeps the llama.cpp default)
+            prompt_cache_bytes: RAM for cached prompt states, so a prompt sharing
+                a prefix with an earlier one only prefills the new tokens (0 disables)
+            use_mmap: Map the model file instead of reading it into memory
+            use_mlock: Lock the weights in RAM so the OS can't page them out
+                mid-generation (needs enough free RAM and a high enough memlock limit)
+            numa: Spread work across NUMA nodes on multi-socket machines
+            offload_kqv: Keep the KV cache on the GPU with the offloaded layers so
+                it isn't copied between host and device every step
+            n_batch: Prompt tokens submitted per decode call during prefill
+                (capped at n_ctx)
+            n_ubatch: Tokens per physical compute batch within n_batch
         """
         self.model_path = model_path
         self.max_tokens = max_tokens
         self.temperature = temperature
         self.n_ctx = n_ctx
+        self.n_gpu_layers = n_gpu_layers
+        self.tensor_split = tensor_split
+        self.main_gpu = main_gpu
+        self.split_mode = split_mode
+        self.use_mmap = use_mmap
+        self.use_mlock = use_mlock
+        self.numa = numa
+        self.offload_kqv = offload_kqv
+        self.n_batch = min(n_batch, n_ctx)
+        self.n_ubatch = min(n_ubatch, self.n_batch)
         
-        # Auto-detect CPU threads if not specified
+        # Auto-detect CPU threads if not specified. SMT siblings share the
+        # core's vector units, so one thread per physical core is faster
         if n_threads is None:
             import multiprocessing
-            self.n_threads = multiprocessing.cpu_count()
+            import psutil
+            self.n_threads = psutil.cpu_count(logical=False) or multiprocessing.cpu_count()
         else:
             self.n_threads = n_threads
+        self.n_threads_batch = n_threads_batch or self.n_threads
             
         self.model = self._load_model()
+        if prompt_cache_bytes:
+            self.model.set_cache(LlamaRAMCache(capacity_bytes=prompt_cache_bytes))
         self.code_tools = CodeTools()
         
+        # Single worker: a llama.cpp context must only be used by one thread at a time
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._batch_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        
+        # Tokenize the fixed system prompts once instead of on every request
+        self._system_tokens: Dict[str, List[int]] = {}
+        for system_prompt in (self.GENERAL_SYSTEM_PROMPT, self.CODE_SYSTEM_PROMPT):
+            self._tokenize_system(system_prompt)
+        
+    @classmethod
+    def get(cls, model_path: str, *args: Any, **kwargs: Any) -> "CodeAssistant":
+        """
+        Return the loaded assistant for these arguments, creating it if needed.
+        
+        Loading maps gigabytes of weights and allocates a KV cache, so every
+        part of the process asking for the same configuration shares one
+        instance for as long as any of them holds it.
+        
+        Args:
+            model_path: Path to GGUF model file
+            *args: Further CodeAssistant arguments
+            **kwargs: Further CodeAssistant keyword arguments
+            
+        Returns:
+            Shared CodeAssistant
+        """
+        key = (
+            os.path.abspath(model_path),
+            tuple(tuple(a) if isinstance(a, list) else a for a in args),
+            tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in kwargs.items())),
+        )
+        with cls._instances_lock:
+            assistant = cls._instances.get(key)
+            if assistant is None:
+                assistant = cls(model_path, *args, **kwargs)
+                cls._instances[key] = assistant
+            return assistant
+    
     def _load_model(self) -> Llama:
         """Load the GGUF model."""
         if not Path(self.model_path).exists():
@@ -52,17 +219,69 @@ class CodeAssistant:
         try:
             print(f"Loading model: {self.model_path}")
             print(f"Using {self.n_threads} CPU threads")
+            if self.n_gpu_layers:
+                layers = "all" if self.n_gpu_layers < 0 else self.n_gpu_layers
+                print(f"Offloading {layers} layers to GPU (if supported by this build)")
+            gpu_options = {}
+            if self.split_mode is not None:
+                gpu_options["split_mode"] = self.split_mode
             model = Llama(
                 model_path=self.model_path,
                 n_ctx=self.n_ctx,
                 n_threads=self.n_threads,
-                verbose=False
+                n_threads_batch=self.n_threads_batch,
+                n_batch=self.n_batch,
+                n_ubatch=self.n_ubatch,
+                logits_all=False,  # Only the last position is sampled
+                n_gpu_layers=self.n_gpu_layers,
+                tensor_split=self.tensor_split,
+                main_gpu=self.main_gpu,
+                use_mmap=self.use_mmap,
+                use_mlock=self.use_mlock,
+                numa=self.numa,
+                offload_kqv=self.offload_kqv,
+                verbose=False,
+                **gpu_options
             )
             print("Model loaded successfully!")
+            self._warn_if_unquantized(model)
+            on_gpu = self.n_gpu_layers and getattr(llama_cpp, "llama_supports_gpu_offload", lambda: False)()
+            if not on_gpu:
+                missing = missing_cpu_features()
+                if missing:
+                    print(f"Warning: this llama-cpp-python build doesn't use {', '.join(missing)} on this CPU; "
+                          f'rebuild with CMAKE_ARGS="-DGGML_NATIVE=ON" for faster CPU inference')
             return model
         except Exception as e:
             raise RuntimeError(f"Failed to load model: {e}")
     
+    def _warn_if_unquantized(self, model: Llama) -> None:
+        """
+        Warn when the weights aren't quantized.
+        
+        Decoding is bound by memory bandwidth, so 16/32-bit weights move 4-8x
+        the bytes per token of a Q4_K_M file, and llama.cpp has no GPU kernels
+        for BF16 at all.
+        
+        Args:
+            model: Loaded model
+        """
+        precision = None
+        file_type = (getattr(model, "metadata", None) or {}).get("general.file_type")
+        if file_type is not None:
+            try:
+                precision = UNQUANTIZED_FILE_TYPES.get(int(file_type))
+            except ValueError:
+                pass
+        else:
+            match = UNQUANTIZED_NAME_RE.search(Path(self.model_path).name)
+            if match:
+                precision = match.group(1).upper()
+        
+        if precision:
+            print(f"Warning: model weights are {precision}; generation will be much slower than a "
+                  f"4-bit model. Re-quantize with llama.cpp, e.g. `llama-quantize model.gguf model.Q4_K_M.gguf Q4_K_M`")
+    
     def generate_response(self, prompt: str, context: str = "") -> str:
         """
         Generate a response for a general prompt.
@@ -74,23 +293,253 @@ class CodeAssistant:
         Returns:
             Generated response
         """
-        system_prompt = """You are a helpful coding assistant. Provide clear, concise, and accurate responses.
-Focus on practical solutions and best practices. If you're not sure about something, say so."""
+        full_prompt = self._build_prompt(self.GENERAL_SYSTEM_PROMPT, prompt, context)
+        
+        return self._run(full_prompt, "Error generating response")
+    
+    def stream_response(self, prompt: str, context: str = "") -> Iterator[str]:
+        """
+        Generate a response for a general prompt, yielding text as it is produced.
+        
+        Args:
+            prompt: User prompt
+            context: Previous conversation context
+            
+        Yields:
+            Pieces of the response in order; joined and stripped they equal
+            what generate_response would return
+        """
+        full_prompt = self._build_prompt(self.GENERAL_SYSTEM_PROMPT, prompt, context)
+        return self._stream(full_prompt, "Error generating response")
+    
+    def stream_code(self, prompt: str) -> Iterator[str]:
+        """
+        Generate code from a prompt, yielding text as it is produced.
         
-        full_prompt = self._build_prompt(system_prompt, prompt, context)
+        Args:
+            prompt: Code generation prompt
+            
+        Yields:
+            Pieces of the generated code in order
+        """
+        full_prompt = self._build_prompt(self.CODE_SYSTEM_PROMPT, prompt)
+        return self._stream(full_prompt, "Error generating code")
+    
+    def stream_explanation(self, code: str, language: str = "python") -> Iterator[str]:
+        """
+        Explain code functionality, yielding text as it is produced.
+        
+        Args:
+            code: Code to explain
+            language: Programming language
+            
+        Yields:
+            Pieces of the explanation in order
+        """
+        return self._stream(self._explain_prompt(code, language), "Error explaining code")
+    
+    def stream_debug(self, code: str, language: str = "python", error_message: Optional[str] = None) -> Iterator[str]:
+        """
+        Debug code and provide fixes, yielding text as it is produced.
+        
+        Args:
+            code: Code to debug
+            language: Programming language
+            error_message: Optional error message
+            
+        Yields:
+            Pieces of the debugging help in order
+        """
+        return self._stream(self._debug_prompt(code, language, error_message), "Error debugging code")
+    
+    def _run(
+        self,
+        full_prompt: List[int],
+        error_prefix: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        stop: Optional[List[str]] = None
+    ) -> str:
+        """
+        Run a completion and return its stripped text.
         
+        Args:
+            full_prompt: Prompt tokens from _build_prompt
+            error_prefix: Text reported before the exception if generation fails
+            max_tokens: Token limit (defaults to the instance setting)
+            temperature: Sampling temperature (defaults to the instance setting)
+            stop: Stop sequences (defaults to STOP_SEQUENCES)
+            
+        Returns:
+            Generated text, or the error message
+        """
         try:
             response = self.model(
                 full_prompt,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                stop=["</s>", "Human:", "Assistant:"],
+                max_tokens=self.max_tokens if max_tokens is None else max_tokens,
+                temperature=self.temperature if temperature is None else temperature,
+                stop=self.STOP_SEQUENCES if stop is None else stop,
                 echo=False
             )
             
             return response['choices'][0]['text'].strip()
         except Exception as e:
-            return f"Error generating response: {e}"
+            return f"{error_prefix}: {e}"
+    
+    @staticmethod
+    def _strip_code_fences(generated_code: str) -> str:
+        """Remove a markdown code block wrapped around generated code."""
+        if not generated_code.startswith("```"):
+            return generated_code
+        
+        body = generated_code[_FENCE_OPEN_RE.match(generated_code).end():]
+        close = _FENCE_CLOSE_RE.search(body)
+        return body[:close.start()] if close else body
+    
+    def _stream(self, full_prompt: List[int], error_prefix: str) -> Iterator[str]:
+        """
+        Run a completion in streaming mode.
+        
+        Args:
+            full_prompt: Prompt tokens from _build_prompt
+            error_prefix: Text reported before the exception if generation fails
+            
+        Yields:
+            Generated text pieces; joined and stripped they equal the
+            non-streaming result
+        """
+        try:
+            for chunk in self.model(
+                full_prompt,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                stop=self.STOP_SEQUENCES,
+                echo=False,
+                stream=True
+            ):
+                yield chunk['choices'][0]['text']
+        except Exception as e:
+            yield f"{error_prefix}: {e}"
+    
+    async def agenerate_response(self, prompt: str, context: str = "") -> str:
+        """
+        Generate a response without blocking the event loop.
+        
+        Requests go through a queue drained by one worker task. Everything
+        queued while the model is busy is taken as the next batch and runs
+        on a dedicated model thread, so concurrent callers never share the
+        llama.cpp context. Identical concurrent requests are generated once
+        and share the answer.
+        
+        Args:
+            prompt: User prompt
+            context: Previous conversation context
+            
+        Returns:
+            Generated response
+        """
+        loop = asyncio.get_running_loop()
+        if self._batch_loop is not loop:
+            self._batch_loop = loop
+            self._batch_queue = asyncio.Queue()
+            self._batch_task = loop.create_task(self._batch_worker(self._batch_queue))
+        
+        future = loop.create_future()
+        self._batch_queue.put_nowait((prompt, context, future))
+        return await future
+    
+    async def run_in_executor(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking model call without blocking the event loop.
+        
+        The call runs on the same model thread as agenerate_response, so it
+        never uses the llama.cpp context concurrently with other requests.
+        
+        Args:
+            func: Callable using this assistant, e.g. self.generate_advanced_code
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+            
+        Returns:
+            Whatever func returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), partial(func, *args, **kwargs))
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Return the model thread, starting it on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llama")
+        return self._executor
+    
+    async def _batch_worker(self, queue: asyncio.Queue) -> None:
+        """Run queued agenerate_response requests batch by batch."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            
+            # Skip requests whose caller already gave up
+            batch = [item for item in batch if not item[2].done()]
+            requests = list(dict.fromkeys((prompt, context) for prompt, context, _ in batch))
+            if not requests:
+                continue
+            
+            try:
+                responses = await loop.run_in_executor(self._get_executor(), self._generate_requests, requests)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            by_request = dict(zip(requests, responses))
+            for prompt, context, future in batch:
+                if not future.done():
+                    future.set_result(by_request[(prompt, context)])
+    
+    def _generate_requests(self, requests: List[Tuple[str, str]]) -> List[str]:
+        """Generate responses for (prompt, context) pairs back to back."""
+        return [self.generate_response(prompt, context) for prompt, context in requests]
+    
+    def warmup(self, system_prompt: Optional[str] = None) -> float:
+        """
+        Evaluate a system prompt once so following prompts reuse its KV cache.
+        
+        llama.cpp keeps the tokens of the last evaluation and only recomputes
+        from the first token that differs, so prompts built on the same system
+        prompt skip its prefill after this call.
+        
+        Args:
+            system_prompt: System prompt to prime (defaults to the general one)
+            
+        Returns:
+            Seconds spent on the warmup pass
+        """
+        prefix = self._tokenize_system(system_prompt or self.GENERAL_SYSTEM_PROMPT)
+        
+        start_time = time.monotonic()
+        self.model(prefix, max_tokens=1, temperature=0.0, echo=False)
+        return time.monotonic() - start_time
+    
+    def generate_batch(self, prompts: List[str], context: str = "") -> List[str]:
+        """
+        Generate responses for several independent prompts.
+        
+        A llama.cpp context can't be driven from several threads at once, so the
+        prompts run back to back through the loaded model. Callers that collect
+        their prompts up front get any future multi-sequence backend for free.
+        
+        Args:
+            prompts: User prompts
+            context: Previous conversation context shared by every prompt
+            
+        Returns:
+            Generated responses, in prompt order
+        """
+        return [self.generate_response(prompt, context) for prompt in prompts]
     
     def generate_code(self, prompt: str) -> str:
         """
@@ -102,24 +551,9 @@ Focus on practical solutions and best practices. If you're not sure about someth
         Returns:
             Generated code
         """
-        system_prompt = """You are a coding assistant. Generate clean, well-documented code.
-Always include necessary imports and follow best practices.
-If the language isn't specified, assume Python."""
+        full_prompt = self._build_prompt(self.CODE_SYSTEM_PROMPT, prompt)
         
-        full_prompt = self._build_prompt(system_prompt, prompt)
-        
-        try:
-            response = self.model(
-                full_prompt,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                stop=["</s>", "Human:", "Assistant:"],
-                echo=False
-            )
-            
-            return response['choices'][0]['text'].strip()
-        except Exception as e:
-            return f"Error generating code: {e}"
+        return self._run(full_prompt, "Error generating code")
 
     def generate_advanced_code(self, prompt: str, language: Optional[str] = None, template: Optional[str] = None) -> str:
         """
@@ -171,31 +605,14 @@ Generate the complete code:"""
         
         full_prompt = self._build_prompt(system_prompt, enhanced_prompt)
         
-        try:
-            response = self.model(
-                full_prompt,
-                max_tokens=min(self.max_tokens * 2, 2048),  # Allow more tokens for code
-                temperature=max(self.temperature - 0.1, 0.1),  # Slightly lower temp for code
-                stop=["</s>", "Human:", "Assistant:", "```\n\n"],
-                echo=False
-            )
-            
-            generated_code = response['choices'][0]['text'].strip()
-            
-            # Clean up the response
-            if generated_code.startswith("```"):
-                # Remove markdown code blocks
-                lines = generated_code.split('\n')
-                if lines[0].startswith("```"):
-                    lines = lines[1:]
-                if lines and lines[-1].strip() == "```":
-                    lines = lines[:-1]
-                generated_code = '\n'.join(lines)
-            
-            return generated_code
-            
-        except Exception as e:
-            return f"Error generating advanced code: {e}"
+        generated_code = self._run(
+            full_prompt,
+            "Error generating advanced code",
+            max_tokens=min(self.max_tokens * 2, 2048),  # Allow more tokens for code
+            temperature=max(self.temperature - 0.1, 0.1),  # Slightly lower temp for code
+            stop=self.STOP_SEQUENCES + ["```\n\n"]
+        )
+        return self._strip_code_fences(generated_code)
     
     def explain_code(self, code: str, language: str = "python") -> str:
         """
@@ -208,24 +625,9 @@ Generate the complete code:"""
         Returns:
             Code explanation
         """
-        system_prompt = f"""You are a coding assistant. Explain the provided {language} code clearly and concisely.
-Focus on what the code does, how it works, and any important patterns or concepts."""
-        
-        prompt = f"Please explain this {language} code:\n\n```{language}\n{code}\n```"
-        full_prompt = self._build_prompt(system_prompt, prompt)
+        full_prompt = self._explain_prompt(code, language)
         
-        try:
-            response = self.model(
-                full_prompt,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                stop=["</s>", "Human:", "Assistant:"],
-                echo=False
-            )
-            
-            return response['choices'][0]['text'].strip()
-        except Exception as e:
-            return f"Error explaining code: {e}"
+        return self._run(full_prompt, "Error explaining code")
     
     def debug_code(self, code: str, language: str = "python", error_message: Optional[str] = None) -> str:
         """
@@ -239,47 +641,65 @@ Focus on what the code does, how it works, and any important patterns or concept
         Returns:
             Debugging help and fixes
         """
-        system_prompt = f"""You are a debugging assistant. Analyze the provided {language} code and identify issues.
-Provide specific fixes and explanations. If an error message is provided, focus on that specific issue."""
+        full_prompt = self._debug_prompt(code, language, error_message)
+        
+        return self._run(full_prompt, "Error debugging code")
+    
+    def _explain_prompt(self, code: str, language: str) -> List[int]:
+        """Build the full prompt for explain_code."""
+        system_prompt = self.EXPLAIN_SYSTEM_PROMPT.format(language=language)
+        prompt = f"Please explain this {language} code:\n\n```{language}\n{code}\n```"
+        return self._build_prompt(system_prompt, prompt)
+    
+    def _debug_prompt(self, code: str, language: str, error_message: Optional[str]) -> List[int]:
+        """Build the full prompt for debug_code."""
+        system_prompt = self.DEBUG_SYSTEM_PROMPT.format(language=language)
         
         if error_message:
             prompt = f"Please debug this {language} code. Error: {error_message}\n\n```{language}\n{code}\n```"
         else:
             prompt = f"Please analyze this {language} code for potential issues:\n\n```{language}\n{code}\n```"
             
-        full_prompt = self._build_prompt(system_prompt, prompt)
+        return self._build_prompt(system_prompt, prompt)
+    
+    def _tokenize_system(self, system_prompt: str) -> List[int]:
+        """
+        Tokenize the system turn of a prompt, caching the result.
         
-        try:
-            response = self.model(
-                full_prompt,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                stop=["</s>", "Human:", "Assistant:"],
-                echo=False
-            )
+        Args:
+            system_prompt: System instructions
             
-            return response['choices'][0]['text'].strip()
-        except Exception as e:
-            return f"Error debugging code: {e}"
+        Returns:
+            Tokens of the system turn, starting with BOS
+        """
+        tokens = self._system_tokens.get(system_prompt)
+        if tokens is None:
+            text = f"<|im_start|>system\n{system_prompt}<|im_end|>\n"
+            tokens = self.model.tokenize(text.encode("utf-8"), add_bos=True, special=True)
+            if len(self._system_tokens) < self.SYSTEM_TOKEN_CACHE_SIZE:
+                self._system_tokens[system_prompt] = tokens
+        return tokens
     
-    def _build_prompt(self, system_prompt: str, user_prompt: str, context: str = "") -> str:
+    def _build_prompt(self, system_prompt: str, user_prompt: str, context: str = "") -> List[int]:
         """
         Build the full prompt with system message and context.
         
+        The system turn comes from the token cache, so only the user part is
+        tokenized per call. The model takes the token list as is.
+        
         Args:
             system_prompt: System instructions
             user_prompt: User input
             context: Previous conversation context
             
         Returns:
-            Formatted prompt
+            Prompt tokens
         """
-        prompt_parts = [f"<|im_start|>system\n{system_prompt}<|im_end|>"]
-        
         if context:
-            prompt_parts.append(f"<|im_start|>user\n{context}<|im_end|>")
-            
-        prompt_parts.append(f"<|im_start|>user\n{user_prompt}<|im_end|>")
-        prompt_parts.append("<|im_start|>assistant\n")
+            turns = f"<|im_start|>user\n{context}<|im_end|>\n<|im_start|>user\n{user_prompt}<|im_end|>\n<|im_start|>assistant\n"
+        else:
+            turns = f"<|im_start|>user\n{user_prompt}<|im_end|>\n<|im_start|>assistant\n"
         
-        return "\n".join(prompt_parts) 
\ No newline at end of file
+        return self._tokenize_system(system_prompt) + self.model.tokenize(
+            turns.encode("utf-8"), add_bos=False, special=True
+        )
@@ -3,10 +3,15 @@ Interactive setup wizard for the God-Tier Coding Agent
 """
 
 import os
+import re
+import sys
 import json
+import hashlib
 from pathlib import Path
 from typing import Dict, List, Optional
+import shutil
 import subprocess
+import psutil
 import requests
 
 from rich.console import Console
@@ -15,9 +20,31 @@ from rich.panel import Panel
 from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
 
+from .gguf import UNQUANTIZED_NAME_RE
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib json module
+    orjson = None
+
 class SetupWizard:
     """Interactive setup wizard"""
     
+    # Model downloads are multi-GB, so read and report progress in 1 MiB steps
+    DOWNLOAD_CHUNK_SIZE = 1 << 20
+    
+    # GGUF weight formats offered for downloads; fewer bits per weight means less
+    # memory traffic per generated token, so faster decoding
+    QUANTIZATION_LEVELS = ["Q4_K_M", "Q5_K_M", "Q6_K", "Q8_0"]
+    
+    # Hugging Face reports the SHA-256 of LFS files in this header on the resolve redirect
+    _SHA256_RE = re.compile(r'^"?([0-9a-f]{64})"?$')
+    
+    # WAL persists in the database file; the other pragmas are per connection
+    # and recorded in the config for the agent to apply
+    SQLITE_PATH = "godtier_agent.db"
+    SQLITE_PRAGMAS = {"synchronous": "NORMAL", "temp_store": "MEMORY", "mmap_size": 134217728}
+    
     def __init__(self):
         self.console = Console()
         self.config = {}
@@ -64,8 +91,19 @@ class SetupWizard:
         
         self.console.print("\n[bold cyan]🤖 AI Model Configuration[/bold cyan]")
         
+        # Check for CUDA devices to offload to
+        gpus = self.detect_cuda_devices()
+        self.config["cuda_devices"] = len(gpus)
+        if gpus:
+            self.console.print(f"[green]Found {len(gpus)} CUDA device(s):[/green]")
+            for gpu in gpus:
+                self.console.print(f"  • {gpu}")
+        else:
+            self.console.print("[yellow]No CUDA device found, the model will run on CPU[/yellow]")
+        
         # Check for existing models
-        model_files = list(Path(".").glob("*.gguf"))
+        with os.scandir(".") as entries:
+            model_files = [entry for entry in entries if entry.name.endswith(".gguf") and entry.is_file()]
         
         if model_files:
             self.console.print(f"[green]Found {len(model_files)} model file(s):[/green]")
@@ -74,19 +112,25 @@ class SetupWizard:
                 self.console.print(f"  • {model.name} ({size_mb:.1f} MB)")
             
             if Confirm.ask("Use existing model files?"):
-                self.config["model_path"] = str(model_files[0])
+                self.config["model_path"] = self.quantize_model(model_files[0].name)
                 return
         
         # Download models
         self.console.print("\n[yellow]No models found. Let's download one![/yellow]")
         
+        quant = Prompt.ask(
+            "Weight quantization (Q4_K_M is fastest, Q8_0 most accurate)",
+            choices=self.QUANTIZATION_LEVELS, default="Q4_K_M"
+        )
+        self.config["quant"] = quant
+        
         models = {
-            "1": ("DeepSeek Coder 1.3B (Recommended)", "deepseek-coder-1.3b-instruct.Q4_K_M.gguf", 
-                  "https://huggingface.co/TheBloke/deepseek-coder-1.3B-instruct-GGUF/resolve/main/deepseek-coder-1.3b-instruct.Q4_K_M.gguf"),
-            "2": ("CodeLlama 7B (More Powerful)", "codellama-7b-instruct.Q4_K_M.gguf",
-                  "https://huggingface.co/TheBloke/CodeLlama-7B-Instruct-GGUF/resolve/main/codellama-7b-instruct.Q4_K_M.gguf"),
-            "3": ("Qwen Coder 1.5B (Fast)", "qwen2.5-coder-1.5b-instruct.Q4_K_M.gguf",
-                  "https://huggingface.co/Qwen/Qwen2.5-Coder-1.5B-Instruct-GGUF/resolve/main/qwen2.5-coder-1.5b-instruct.Q4_K_M.gguf")
+            "1": ("DeepSeek Coder 1.3B (Recommended)", f"deepseek-coder-1.3b-instruct.{quant}.gguf", 
+                  f"https://huggingface.co/TheBloke/deepseek-coder-1.3B-instruct-GGUF/resolve/main/deepseek-coder-1.3b-instruct.{quant}.gguf"),
+            "2": ("CodeLlama 7B (More Powerful)", f"codellama-7b-instruct.{quant}.gguf",
+                  f"https://huggingface.co/TheBloke/CodeLlama-7B-Instruct-GGUF/resolve/main/codellama-7b-instruct.{quant}.gguf"),
+            "3": ("Qwen Coder 1.5B (Fast)", f"qwen2.5-coder-1.5b-instruct.{quant}.gguf",
+                  f"https://huggingface.co/Qwen/Qwen2.5-Coder-1.5B-Instruct-GGUF/resolve/main/qwen2.5-coder-1.5b-instruct.{quant}.gguf")
         }
         
         table = Table(title="Available Models")
@@ -106,16 +150,66 @@ class SetupWizard:
             self.download_model(url, filename)
             self.config["model_path"] = filename
     
-    def download_model(self, url: str, filename: str):
-        """Download model with progress bar"""
+    def quantize_model(self, model_path: str) -> str:
+        """Offer to quantize an unquantized (F16/BF16/F32) model with llama.cpp"""
+        
+        if not UNQUANTIZED_NAME_RE.search(model_path):
+            return model_path
+        
+        self.console.print(f"[yellow]{model_path} isn't quantized; a 4-bit copy generates several times faster[/yellow]")
+        quantize = shutil.which("llama-quantize") or shutil.which("quantize")
+        if not quantize:
+            self.console.print("[yellow]Install llama.cpp's llama-quantize tool to convert it[/yellow]")
+            return model_path
+        
+        quant = Prompt.ask("Weight quantization", choices=self.QUANTIZATION_LEVELS, default="Q4_K_M")
+        if not Confirm.ask(f"Create a {quant} copy of {model_path}?", default=True):
+            return model_path
+        
+        output_path = UNQUANTIZED_NAME_RE.sub(quant, model_path, count=1)
+        try:
+            with self.console.status(f"[cyan]Quantizing to {quant}...[/cyan]"):
+                subprocess.check_call([quantize, model_path, output_path, quant],
+                                    stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.DEVNULL)
+        except (OSError, subprocess.CalledProcessError):
+            self.console.print("[yellow]⚠️ Quantization failed; using the original model[/yellow]")
+            return model_path
+        
+        self.config["quant"] = quant
+        self.console.print(f"[green]✅ Created {output_path}[/green]")
+        return output_path
+    
+    def detect_cuda_devices(self) -> List[str]:
+        """List NVIDIA GPUs reported by nvidia-smi"""
+        
+        try:
+            result = subprocess.run(["nvidia-smi", "-L"], capture_output=True, text=True, timeout=10)
+        except (OSError, subprocess.SubprocessError):
+            return []
+        
+        if result.returncode != 0:
+            return []
+        return [line.strip() for line in result.stdout.splitlines() if line.startswith("GPU")]
+    
+    def download_model(self, url: str, filename: str, sha256: Optional[str] = None):
+        """Download model with progress bar, verifying its SHA-256 when known"""
         
         self.console.print(f"[cyan]Downloading {filename}...[/cyan]")
         
+        # Download next to the target and rename at the end, so an interrupted
+        # download never leaves a truncated .gguf that looks like a model
+        partial = Path(f"{filename}.part")
+        
         try:
             response = requests.get(url, stream=True)
             response.raise_for_status()
             
             total_size = int(response.headers.get('content-length', 0))
+            expected = sha256 or self._published_sha256(response)
+            # hashlib's OpenSSL backend uses SHA-NI/ARMv8 SHA2 where available, so
+            # hashing keeps up with the download
+            digest = hashlib.sha256()
             
             with Progress(
                 SpinnerColumn(),
@@ -123,23 +217,41 @@ class SetupWizard:
                 BarColumn(),
                 TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
                 TimeRemainingColumn(),
-                console=self.console
+                console=self.console,
+                refresh_per_second=4
             ) as progress:
                 
                 task = progress.add_task(f"Downloading {filename}", total=total_size)
                 
-                with open(filename, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
+                with open(partial, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
                         f.write(chunk)
+                        digest.update(chunk)
                         progress.update(task, advance=len(chunk))
             
+            actual = digest.hexdigest()
+            if expected and actual != expected.lower():
+                raise ValueError(f"checksum mismatch (expected {expected}, got {actual})")
+            
+            os.replace(partial, filename)
             self.console.print(f"[green]✅ Downloaded {filename}[/green]")
+            self.console.print(f"[dim]SHA-256 {actual}{' (verified)' if expected else ''}[/dim]")
             
         except Exception as e:
+            partial.unlink(missing_ok=True)
             self.console.print(f"[red]❌ Download failed: {e}[/red]")
             self.console.print("[yellow]You can download manually from:[/yellow]")
             self.console.print(f"[blue]{url}[/blue]")
     
+    def _published_sha256(self, response) -> Optional[str]:
+        """SHA-256 the server published for a download, if any"""
+        
+        for r in (*response.history, response):
+            match = self._SHA256_RE.match(r.headers.get("X-Linked-Etag", ""))
+            if match:
+                return match.group(1)
+        return None
+    
     def setup_preferences(self):
         """Setup user preferences"""
         
@@ -150,6 +262,28 @@ class SetupWizard:
         self.config["temperature"] = float(Prompt.ask("Temperature (creativity)", default="0.7"))
         self.config["context_window"] = IntPrompt.ask("Context window size", default=2048)
         
+        # CPU threads (physical cores by default; SMT siblings slow generation down)
+        physical_cores = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+        self.config["n_threads"] = IntPrompt.ask("CPU threads for generation", default=physical_cores)
+        self.config["n_threads_batch"] = IntPrompt.ask("CPU threads for prompt processing", default=self.config["n_threads"])
+        
+        # GPU offload (tensor-core kernels are picked by the llama.cpp CUDA build)
+        cuda_devices = self.config.get("cuda_devices", 0)
+        self.config["n_gpu_layers"] = IntPrompt.ask(
+            "GPU layers to offload (-1=all, 0=CPU)", default=-1 if cuda_devices else 0
+        )
+        if cuda_devices > 1 and self.config["n_gpu_layers"]:
+            self.config["main_gpu"] = IntPrompt.ask("Main GPU index", default=0)
+        
+        # Only offer to lock the weights in RAM when they fit with room to spare
+        model_path = Path(self.config.get("model_path", ""))
+        if model_path.is_file():
+            model_size = model_path.stat().st_size
+            if psutil.virtual_memory().available > model_size * 1.5:
+                self.config["use_mlock"] = Confirm.ask("Lock model weights in RAM (avoids paging stalls)?", default=True)
+            else:
+                self.config["use_mlock"] = False
+        
         # UI preferences
         self.config["theme"] = Prompt.ask("Preferred theme", choices=["dark", "light"], default="dark")
         self.config["auto_open_browser"] = Confirm.ask("Auto-open browser for web UI?", default=True)
@@ -185,6 +319,10 @@ class SetupWizard:
                 "enabled": True,
                 "type": Prompt.ask("Database type", choices=["sqlite", "postgresql", "mysql"], default="sqlite")
             }
+            # Recorded here so the config is saved with them, before finalize_setup creates the file
+            if integrations["database"]["type"] == "sqlite":
+                integrations["database"]["path"] = self.SQLITE_PATH
+                integrations["database"]["pragmas"] = dict(self.SQLITE_PRAGMAS)
         
         self.config["integrations"] = integrations
     
@@ -217,8 +355,11 @@ class SetupWizard:
         """Load existing configuration"""
         
         try:
-            with open(self.config_file, 'r') as f:
-                self.config = json.load(f)
+            if orjson is not None:
+                self.config = orjson.loads(self.config_file.read_bytes())
+            else:
+                with open(self.config_file, 'r') as f:
+                    self.config = json.load(f)
             self.console.print("[green]✅ Loaded existing configuration[/green]")
         except Exception as e:
             self.console.print(f"[red]❌ Failed to load config: {e}[/red]")
@@ -227,8 +368,11 @@ class SetupWizard:
         """Save configuration to file"""
         
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
+            if orjson is not None:
+                self.config_file.write_bytes(orjson.dumps(self.config, option=orjson.OPT_INDENT_2))
+            else:
+                with open(self.config_file, 'w') as f:
+                    json.dump(self.config, f, indent=2)
             self.console.print(f"[green]✅ Configuration saved to {self.config_file}[/green]")
         except Exception as e:
             self.console.print(f"[red]❌ Failed to save config: {e}[/red]")
@@ -250,18 +394,59 @@ class SetupWizard:
         # Install additional dependencies if needed
         if Confirm.ask("Install additional Python packages?", default=True):
             self.install_dependencies()
+        
+        # CPU-only setups benefit from a llama.cpp build tuned to this CPU
+        if not self.config.get("cuda_devices"):
+            self.optimize_cpu_build()
+    
+    def optimize_cpu_build(self):
+        """Offer to rebuild llama-cpp-python for the host CPU's SIMD extensions"""
+        
+        try:
+            from .model import missing_cpu_features
+            missing = missing_cpu_features()
+        except Exception:
+            return
+        
+        if not missing:
+            return
+        
+        self.console.print(f"[yellow]Your CPU supports {', '.join(missing)}, but the installed llama-cpp-python doesn't use it[/yellow]")
+        if not Confirm.ask("Rebuild llama-cpp-python for this CPU? (takes several minutes)", default=False):
+            return
+        
+        env = dict(os.environ, CMAKE_ARGS="-DGGML_NATIVE=ON", FORCE_CMAKE="1")
+        try:
+            with self.console.status("[cyan]Building llama-cpp-python...[/cyan]"):
+                subprocess.check_call(
+                    [sys.executable, "-m", "pip", "install", "--force-reinstall", "--no-cache-dir",
+                     "--no-binary", "llama-cpp-python", "llama-cpp-python"],
+                    env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                )
+            self.console.print("[green]✅ Rebuilt llama-cpp-python for this CPU[/green]")
+        except subprocess.CalledProcessError:
+            self.console.print("[yellow]⚠️ Rebuild failed; keeping the existing build[/yellow]")
     
     def setup_database(self):
         """Setup database"""
         
         self.console.print("[cyan]Setting up database...[/cyan]")
         
-        db_type = self.config["integrations"]["database"]["type"]
+        database = self.config["integrations"]["database"]
         
-        if db_type == "sqlite":
+        if database["type"] == "sqlite":
             # Create SQLite database
             import sqlite3
-            conn = sqlite3.connect("godtier_agent.db")
+            db_path = database.get("path", self.SQLITE_PATH)
+            conn = sqlite3.connect(db_path)
+            
+            # WAL persists in the file, so every later connection appends to the
+            # log instead of rewriting pages under a rollback journal
+            pragmas = database.get("pragmas", self.SQLITE_PRAGMAS)
+            conn.execute("PRAGMA journal_mode=WAL")
+            for name, value in pragmas.items():
+                conn.execute(f"PRAGMA {name}={value}")
+            
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS conversations (
                     id INTEGER PRIMARY KEY,
@@ -270,8 +455,10 @@ class SetupWizard:
                     ai_response TEXT
                 )
             """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_conversations_timestamp ON conversations (timestamp)")
             conn.commit()
             conn.close()
+            
             self.console.print("[green]✅ SQLite database created[/green]")
     
     def install_dependencies(self):
@@ -294,9 +481,21 @@ class SetupWizard:
         if optional_packages:
             self.console.print(f"[cyan]Installing {len(optional_packages)} additional packages...[/cyan]")
             
+            # One resolver run for everything; retry one by one only to find what failed
+            pip_install = [sys.executable, "-m", "pip", "install", "--no-input", "--prefer-binary"]
+            try:
+                subprocess.check_call(pip_install + optional_packages,
+                                    stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.DEVNULL)
+                for package in optional_packages:
+                    self.console.print(f"[green]✅ Installed {package}[/green]")
+                return
+            except subprocess.CalledProcessError:
+                pass
+            
             for package in optional_packages:
                 try:
-                    subprocess.check_call(["pip", "install", package], 
+                    subprocess.check_call(pip_install + [package], 
                                         stdout=subprocess.DEVNULL, 
                                         stderr=subprocess.DEVNULL)
                     self.console.print(f"[green]✅ Installed {package}[/green]")
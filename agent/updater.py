@@ -2,25 +2,115 @@
 Updater module for models and components
 """
 
+import asyncio
+import atexit
+import hashlib
 import json
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from importlib import metadata as importlib_metadata
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
+from rich.markup import escape
 from rich.panel import Panel
 from rich.table import Table
 
+try:
+    import aiohttp
+except ImportError:  # Optional: falls back to requests on worker threads
+    aiohttp = None
+
+try:
+    from packaging.version import InvalidVersion, Version
+except ImportError:  # Optional: any version difference counts as an update
+    Version = None
+
+def _is_newer(latest: str, current: str) -> bool:
+    """Whether PyPI's latest version is newer than the installed one"""
+    if Version is None:
+        return latest != current
+    try:
+        return Version(latest) > Version(current)
+    except InvalidVersion:
+        return latest != current
+
+class _RangesIgnored(Exception):
+    """The server answered a range request with something other than the range"""
+
+class _ProgressReader:
+    """Readable wrapper that reports bytes read to a Rich progress task"""
+    
+    def __init__(self, raw, progress: Progress, task, update_bytes: int = 1 << 20):
+        self._raw = raw
+        self._progress = progress
+        self._task = task
+        self._update_bytes = update_bytes
+        self._pending = 0
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self._raw.read(size)
+        self._pending += len(data)
+        # Report progress every update_bytes and at EOF instead of on every read
+        if self._pending >= self._update_bytes or (not data and self._pending):
+            self._progress.update(self._task, advance=self._pending)
+            self._pending = 0
+        return data
+
 class Updater:
     """Handle updates for models and components"""
     
+    PYPI_JSON_URL = "https://pypi.org/pypi/{name}/json"
+    PYPI_CONCURRENCY = 10
+    PYPI_TIMEOUT = 5
+    
+    # Large model downloads are split into RANGE_PIECE_BYTES pieces fetched over
+    # parallel connections; finished pieces are recorded so a retry resumes
+    DOWNLOAD_CONNECTIONS = 8
+    PARALLEL_MIN_BYTES = 64 << 20
+    RANGE_PIECE_BYTES = 16 << 20
+    DOWNLOAD_CHUNK_SIZE = 1 << 20
+    # A failed piece is retried after RANGE_RETRY_BACKOFF seconds, doubling each time
+    RANGE_RETRIES = 4
+    RANGE_RETRY_BACKOFF = 1.0
+    
+    # PyPI answers are cached on disk: fresh entries are used as is, older ones
+    # are revalidated with their ETag, and stale ones are fetched again
+    CACHE_DIR = Path.home() / ".cache" / "god-tier-agent"
+    PYPI_CACHE_FRESH = 60 * 60
+    PYPI_CACHE_MAX_AGE = 24 * 60 * 60
+    
+    # Plain requests calls share one pooled session; (connect, read) seconds for downloads
+    HTTP_RETRIES = 3
+    DOWNLOAD_TIMEOUT = (10, 60)
+    
     def __init__(self):
         self.console = Console()
         self.config_file = Path("config.json")
         self.update_info_url = "https://api.github.com/repos/godtier-ai/coding-agent/releases/latest"
         
-    def check_and_update(self):
-        """Check for and apply updates"""
+        # Keep-alive connections and TLS sessions are reused across requests,
+        # and transient connection errors are retried with backoff
+        adapter = HTTPAdapter(
+            pool_connections=self.DOWNLOAD_CONNECTIONS,
+            pool_maxsize=max(self.DOWNLOAD_CONNECTIONS, self.PYPI_CONCURRENCY),
+            max_retries=Retry(total=self.HTTP_RETRIES, backoff_factor=0.3)
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        atexit.register(self.session.close)
+        
+    def check_and_update(self, force: bool = False):
+        """Check for and apply updates (force offers a reinstall even when nothing is outdated)"""
         
         self.console.print(Panel(
             "[bold cyan]📦 God-Tier Coding Agent Updater[/bold cyan]\n"
@@ -28,14 +118,19 @@ class Updater:
             border_style="cyan"
         ))
         
-        # Check for app updates
-        self.check_app_updates()
-        
-        # Check for model updates
-        self.check_model_updates()
-        
-        # Check for component updates
-        self.check_component_updates()
+        # The PyPI queries are the slow part, so they run in the background
+        # while the local checks print; output order stays the same
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            outdated = executor.submit(asyncio.run, self._check_outdated_async())
+            
+            # Check for app updates
+            self.check_app_updates()
+            
+            # Check for model updates
+            self.check_model_updates()
+            
+            # Check for component updates
+            self.check_component_updates(force, outdated)
         
         self.console.print(Panel(
             "[bold green]✅ Update check complete![/bold green]",
@@ -94,46 +189,178 @@ class Updater:
         
         self.console.print(table)
     
-    def check_component_updates(self):
-        """Check for component updates"""
+    def check_component_updates(self, force: bool = False, outdated: Optional[Future] = None):
+        """Check for component updates (outdated: an already started PyPI check to wait for)"""
         
         self.console.print("\n[bold cyan]🔧 Checking component updates...[/bold cyan]")
         
         # Check Python dependencies
         try:
-            import subprocess
-            result = subprocess.run(["pip", "list", "--outdated"], 
-                                  capture_output=True, text=True)
+            if outdated is not None:
+                outdated_packages = outdated.result()
+            else:
+                outdated_packages = asyncio.run(self._check_outdated_async())
             
-            if result.returncode == 0 and result.stdout.strip():
-                outdated_packages = result.stdout.strip().split('\n')[2:]  # Skip header
+            if outdated_packages is None:
+                self.console.print("[yellow]⚠️ Couldn't reach PyPI to check packages[/yellow]")
+            elif outdated_packages:
+                self.console.print(f"[yellow]📦 Found {len(outdated_packages)} outdated packages[/yellow]")
                 
-                if outdated_packages:
-                    self.console.print(f"[yellow]📦 Found {len(outdated_packages)} outdated packages[/yellow]")
-                    
-                    table = Table(title="Outdated Packages")
-                    table.add_column("Package", style="cyan")
-                    table.add_column("Current", style="yellow")
-                    table.add_column("Latest", style="green")
-                    
-                    for package_line in outdated_packages[:10]:  # Show first 10
-                        if package_line.strip():
-                            parts = package_line.split()
-                            if len(parts) >= 3:
-                                table.add_row(parts[0], parts[1], parts[2])
-                    
-                    self.console.print(table)
-                    
-                    if self.console.input("\n[bold cyan]Update packages? (y/n): [/bold cyan]").lower() == 'y':
-                        self.update_packages()
-                else:
-                    self.console.print("[green]✅ All packages are up to date[/green]")
+                table = Table(title="Outdated Packages")
+                table.add_column("Package", style="cyan")
+                table.add_column("Current", style="yellow")
+                table.add_column("Latest", style="green")
+                
+                for name, current, latest in outdated_packages[:10]:  # Show first 10
+                    table.add_row(name, current, latest)
+                
+                self.console.print(table)
+                
+                if self.console.input("\n[bold cyan]Update packages? (y/n): [/bold cyan]").lower() == 'y':
+                    self.update_packages()
+            elif force or self._requirements_changed():
+                # Nothing is outdated, but requirements.txt may list packages that
+                # were never installed
+                self.console.print("[green]✅ All packages are up to date[/green]")
+                reason = "Reinstall" if force else "requirements.txt changed since the last update. Install"
+                if self.console.input(f"\n[bold cyan]{reason} packages? (y/n): [/bold cyan]").lower() == 'y':
+                    self.update_packages()
             else:
                 self.console.print("[green]✅ All packages are up to date[/green]")
                 
         except Exception as e:
             self.console.print(f"[red]❌ Failed to check packages: {e}[/red]")
     
+    async def _check_outdated_async(self) -> Optional[List[Tuple[str, str, str]]]:
+        """
+        Compare installed distributions with PyPI, querying packages concurrently.
+        
+        Returns:
+            (name, installed, latest) for each outdated package, or None when
+            PyPI couldn't be reached at all
+        """
+        installed = {}
+        for dist in importlib_metadata.distributions():
+            name = dist.metadata["Name"]
+            if name:
+                installed.setdefault(name, dist.version)
+        
+        now = time.time()
+        cache = {
+            name: entry for name, entry in self._load_pypi_cache().items()
+            if now - entry.get("fetched_at", 0) < self.PYPI_CACHE_MAX_AGE
+        }
+        
+        semaphore = asyncio.Semaphore(self.PYPI_CONCURRENCY)
+        
+        async def latest_version(session, name: str) -> Optional[str]:
+            entry = cache.get(name)
+            if entry and now - entry["fetched_at"] < self.PYPI_CACHE_FRESH:
+                return entry["version"]
+            
+            headers = {"If-None-Match": entry["etag"]} if entry and entry.get("etag") else {}
+            async with semaphore:
+                try:
+                    status, etag, data = await self._get_pypi_json(session, name, headers)
+                    if status == 304 and entry:
+                        entry["fetched_at"] = now
+                        return entry["version"]
+                    if status == 404:
+                        # Not on PyPI (local or private package); remember that too
+                        cache[name] = {"version": None, "etag": None, "fetched_at": now}
+                        return None
+                    if status != 200:
+                        return None
+                    cache[name] = {"version": data["info"]["version"], "etag": etag, "fetched_at": now}
+                    return cache[name]["version"]
+                except (OSError, asyncio.TimeoutError, requests.RequestException, KeyError, ValueError):
+                    return None
+        
+        if aiohttp is not None:
+            timeout = aiohttp.ClientTimeout(total=self.PYPI_TIMEOUT)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                latest = await asyncio.gather(*(latest_version(session, name) for name in installed))
+        else:
+            latest = await asyncio.gather(*(latest_version(None, name) for name in installed))
+        
+        if installed and not any(latest):
+            return None
+        self._save_pypi_cache(cache)
+        
+        return sorted(
+            ((name, current, newest) for (name, current), newest in zip(installed.items(), latest)
+             if newest and _is_newer(newest, current)),
+            key=lambda package: package[0].lower()
+        )
+    
+    def _load_pypi_cache(self) -> Dict[str, Dict]:
+        """Load cached PyPI versions ({name: {version, etag, fetched_at}})"""
+        
+        try:
+            with open(self.CACHE_DIR / "pypi_index.json", 'r') as f:
+                cache = json.load(f)
+            return cache if isinstance(cache, dict) else {}
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_pypi_cache(self, cache: Dict[str, Dict]):
+        """Write the PyPI version cache, replacing the old file atomically"""
+        
+        try:
+            self.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            cache_file = self.CACHE_DIR / "pypi_index.json"
+            temp_file = cache_file.with_suffix(".tmp")
+            with open(temp_file, 'w') as f:
+                json.dump(cache, f)
+            os.replace(temp_file, cache_file)
+        except OSError:
+            pass
+    
+    async def _get_pypi_json(self, session, name: str, headers: Dict[str, str]) -> Tuple[int, Optional[str], Optional[Dict]]:
+        """
+        Fetch a package's PyPI JSON.
+        
+        Args:
+            session: aiohttp session, or None to use requests on a worker thread
+            name: Distribution name
+            headers: Extra request headers
+            
+        Returns:
+            (HTTP status, ETag, parsed body for 200 responses)
+        """
+        url = self.PYPI_JSON_URL.format(name=name)
+        if session is not None:
+            async with session.get(url, headers=headers) as response:
+                data = await response.json(content_type=None) if response.status == 200 else None
+                return response.status, response.headers.get("ETag"), data
+        
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            None, lambda: self.session.get(url, headers=headers, timeout=self.PYPI_TIMEOUT)
+        )
+        data = response.json() if response.status_code == 200 else None
+        return response.status_code, response.headers.get("ETag"), data
+    
+    def _requirements_digest(self) -> Optional[str]:
+        """Digest of requirements.txt and its location, or None without one"""
+        
+        requirements = Path("requirements.txt")
+        if not requirements.exists():
+            return None
+        return hashlib.sha256(
+            str(requirements.resolve()).encode("utf-8") + b"\0" + requirements.read_bytes()
+        ).hexdigest()
+    
+    def _requirements_changed(self) -> bool:
+        """Whether requirements.txt changed since the last successful update"""
+        
+        digest = self._requirements_digest()
+        marker = self.CACHE_DIR / "requirements.sha256"
+        try:
+            return digest is not None and marker.read_text().strip() != digest
+        except OSError:
+            return digest is not None
+    
     def update_packages(self):
         """Update Python packages"""
         
@@ -148,48 +375,259 @@ class Updater:
                 
                 task = progress.add_task("Updating packages...", total=None)
                 
-                import subprocess
-                result = subprocess.run(["pip", "install", "--upgrade", "-r", "requirements.txt"], 
-                                      capture_output=True, text=True)
+                returncode, output = asyncio.run(self._run_pip(
+                    ["install", "--upgrade", "-r", "requirements.txt"], progress, task
+                ))
                 
-                if result.returncode == 0:
+                if returncode == 0:
                     self.console.print("[green]✅ Packages updated successfully[/green]")
+                    # Remember which requirements.txt was installed, so an unchanged
+                    # file with nothing outdated doesn't prompt again
+                    digest = self._requirements_digest()
+                    if digest:
+                        self.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                        (self.CACHE_DIR / "requirements.sha256").write_text(digest)
                 else:
-                    self.console.print(f"[red]❌ Package update failed: {result.stderr}[/red]")
+                    self.console.print(f"[red]❌ Package update failed: {escape(output)}[/red]")
                     
         except Exception as e:
             self.console.print(f"[red]❌ Failed to update packages: {e}[/red]")
     
+    async def _run_pip(self, args: List[str], progress: Progress, task) -> Tuple[int, str]:
+        """
+        Run pip, showing each line it prints as the progress description.
+        
+        Returns:
+            (exit code, the last lines of output for error reporting)
+        """
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "pip", *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+        
+        tail = deque(maxlen=20)
+        async for raw_line in process.stdout:
+            line = raw_line.decode("utf-8", "replace").rstrip()
+            if line:
+                tail.append(line)
+                progress.update(task, description=escape(line[:100]))
+        
+        return await process.wait(), "\n".join(tail)
+    
     def download_model(self, url: str, filename: str):
         """Download a model file"""
         
         self.console.print(f"[cyan]Downloading {filename}...[/cyan]")
         
         try:
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            
             with Progress(
                 SpinnerColumn(),
                 TextColumn("[progress.description]{task.description}"),
                 BarColumn(),
                 TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
                 TimeRemainingColumn(),
-                console=self.console
+                console=self.console,
+                refresh_per_second=4
             ) as progress:
                 
-                task = progress.add_task(f"Downloading {filename}", total=total_size)
+                task = progress.add_task(f"Downloading {filename}", total=None)
                 
-                with open(filename, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                        progress.update(task, advance=len(chunk))
+                # Servers without range support get the single-stream download; a ranged
+                # download that keeps failing leaves its finished pieces for the next run
+                downloaded = False
+                if aiohttp is not None:
+                    try:
+                        downloaded = asyncio.run(self._download_ranges(url, filename, progress, task))
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        self.console.print(f"[red]❌ Download failed: {escape(str(e))}[/red]")
+                        self.console.print("[yellow]Finished pieces are kept; run the download again to resume[/yellow]")
+                        return False
+                if not downloaded:
+                    self._download_stream(url, filename, progress, task)
             
             self.console.print(f"[green]✅ Downloaded {filename}[/green]")
             return True
             
         except Exception as e:
             self.console.print(f"[red]❌ Download failed: {e}[/red]")
-            return False 
\ No newline at end of file
+            return False
+    
+    async def _download_ranges(self, url: str, filename: str, progress: Progress, task) -> bool:
+        """
+        Download a file as parallel byte ranges written into <filename>.partial.
+        
+        Finished pieces are recorded in <filename>.ranges along with the file's
+        size and ETag, so an interrupted download only fetches the missing
+        pieces next time. The partial file replaces filename only once every
+        piece has arrived.
+        
+        A piece that fails is retried with exponential backoff. If it keeps
+        failing the error is raised, and the finished pieces stay on disk.
+        
+        Returns:
+            False when the server doesn't support ranges (including answering a
+            range request with the whole file), the file is too small to be worth
+            splitting, or a single-stream partial download is waiting to be resumed
+        """
+        partial = Path(f"{filename}.partial")
+        state_file = Path(f"{filename}.ranges")
+        if partial.exists() and not state_file.exists():
+            return False  # Left by _download_stream, which resumes it from its size
+        
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.head(url, allow_redirects=True) as response:
+                if response.status != 200:
+                    return False
+                total_size = int(response.headers.get("Content-Length", 0))
+                accepts_ranges = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+                etag = response.headers.get("ETag")
+                target_url = str(response.url)  # Skip the redirect on every range
+            
+            if not accepts_ranges or total_size < self.PARALLEL_MIN_BYTES:
+                return False
+            
+            # Only resume pieces of the same file version; without a strong
+            # validator there is no way to tell, so start over
+            if etag and etag.startswith("W/"):
+                etag = None
+            state = self._load_range_state(state_file)
+            if not (etag and partial.exists() and state.get("etag") == etag and state.get("size") == total_size):
+                state = {"etag": etag, "size": total_size, "done": []}
+                with open(partial, 'wb') as f:
+                    f.truncate(total_size)
+                self._save_range_state(state_file, state)
+            
+            done = set(state["done"])
+            pieces = [
+                (start, min(start + self.RANGE_PIECE_BYTES, total_size) - 1)
+                for start in range(0, total_size, self.RANGE_PIECE_BYTES)
+                if start not in done
+            ]
+            progress.update(task, total=total_size, completed=total_size - sum(end - start + 1 for start, end in pieces))
+            
+            semaphore = asyncio.Semaphore(self.DOWNLOAD_CONNECTIONS)
+            
+            async def fetch_piece(start: int, end: int):
+                headers = {"Range": f"bytes={start}-{end}"}
+                if etag:
+                    headers["If-Range"] = etag  # A changed file comes back as 200, not 206
+                for attempt in range(self.RANGE_RETRIES + 1):
+                    received = pending = 0
+                    try:
+                        async with semaphore, session.get(target_url, headers=headers) as response:
+                            if response.status != 206:
+                                raise _RangesIgnored(f"server ignored range request (HTTP {response.status})")
+                            with open(partial, 'r+b') as f:
+                                f.seek(start)
+                                # iter_chunked yields whatever has arrived, often far less than
+                                # a chunk, so progress is reported once per DOWNLOAD_CHUNK_SIZE
+                                async for chunk in response.content.iter_chunked(self.DOWNLOAD_CHUNK_SIZE):
+                                    f.write(chunk)
+                                    received += len(chunk)
+                                    pending += len(chunk)
+                                    if pending >= self.DOWNLOAD_CHUNK_SIZE:
+                                        progress.update(task, advance=pending)
+                                        pending = 0
+                                progress.update(task, advance=pending)
+                                pending = 0
+                            if received != end - start + 1:
+                                raise aiohttp.ClientPayloadError(f"range {start}-{end} ended after {received} bytes")
+                        break
+                    except (aiohttp.ClientError, asyncio.TimeoutError):
+                        # Take back the progress reported for the bytes that will be fetched again
+                        progress.update(task, advance=pending - received)
+                        if attempt == self.RANGE_RETRIES:
+                            raise
+                        await asyncio.sleep(self.RANGE_RETRY_BACKOFF * 2 ** attempt)
+                
+                state["done"].append(start)
+                self._save_range_state(state_file, state)
+            
+            try:
+                await asyncio.gather(*(fetch_piece(start, end) for start, end in pieces))
+            except _RangesIgnored:
+                return False
+        
+        os.replace(partial, filename)
+        state_file.unlink(missing_ok=True)
+        return True
+    
+    def _load_range_state(self, state_file: Path) -> Dict:
+        """Load a ranged download's state ({etag, size, done: [piece offsets]})"""
+        
+        try:
+            with open(state_file, 'r') as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_range_state(self, state_file: Path, state: Dict):
+        """Write a ranged download's state, replacing the old file atomically"""
+        
+        temp_file = state_file.with_suffix(".tmp")
+        with open(temp_file, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_file, state_file)
+    
+    def _download_stream(self, url: str, filename: str, progress: Progress, task):
+        """
+        Download a file over a single connection, resuming an interrupted one.
+        
+        Data goes to <filename>.partial and the server's ETag to <filename>.etag.
+        When both exist, only the missing tail is requested; If-Range makes the
+        server send the whole file instead if it changed upstream meanwhile.
+        """
+        partial = Path(f"{filename}.partial")
+        etag_file = Path(f"{filename}.etag")
+        
+        # A ranged download's partial file has holes, so its size says nothing
+        # about how much arrived; start that one over
+        state_file = Path(f"{filename}.ranges")
+        if state_file.exists():
+            partial.unlink(missing_ok=True)
+            state_file.unlink()
+        
+        headers = {}
+        offset = partial.stat().st_size if partial.exists() else 0
+        etag = etag_file.read_text().strip() if etag_file.exists() else ""
+        if offset and etag and not etag.startswith("W/"):  # If-Range needs a strong validator
+            headers = {"Range": f"bytes={offset}-", "If-Range": etag}
+        
+        response = self.session.get(url, stream=True, headers=headers, timeout=self.DOWNLOAD_TIMEOUT)
+        if response.status_code == 416:  # Partial file is already complete or invalid
+            response.close()
+            partial.unlink()
+            offset, headers = 0, {}
+            response = self.session.get(url, stream=True, timeout=self.DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+        
+        resumed = headers and response.status_code == 206
+        if not resumed:
+            offset = 0
+        
+        etag = response.headers.get("ETag")
+        if etag:
+            etag_file.write_text(etag)
+        else:
+            etag_file.unlink(missing_ok=True)
+        
+        total_size = int(response.headers.get('content-length', 0))
+        progress.update(task, total=offset + total_size if total_size else None, completed=offset)
+        
+        # Let copyfileobj move 1 MiB blocks straight from the socket reader
+        # (still decoding any Content-Encoding) instead of iterating 8 KiB chunks
+        response.raw.decode_content = True
+        with open(partial, 'ab' if resumed else 'wb') as f:
+            shutil.copyfileobj(_ProgressReader(response.raw, progress, task, self.DOWNLOAD_CHUNK_SIZE), f, self.DOWNLOAD_CHUNK_SIZE)
+        
+        # A connection closed early ends the copy without an error; keep the partial
+        # file and ETag so the next run resumes it. Decoded sizes can't be checked
+        received = partial.stat().st_size
+        if total_size and not response.headers.get("Content-Encoding") and received != offset + total_size:
+            raise IOError(f"download ended after {received} of {offset + total_size} bytes")
+        
+        os.replace(partial, filename)
+        etag_file.unlink(missing_ok=True)
@@ -5,13 +5,16 @@ Beautiful FastAPI web server for the God-Tier Coding Agent
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 import json
 import asyncio
+import hashlib
 import os
+from collections import OrderedDict
 from pathlib import Path
 import aiofiles
 
@@ -19,39 +22,67 @@ from .model import CodeAssistant
 from .memory import ConversationMemory
 from .analyzer import CodeAnalyzer
 
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultJSONResponse
+except ImportError:  # Optional: falls back to the stdlib json module
+    orjson = None
+    DefaultJSONResponse = JSONResponse
+
+UPLOAD_CHUNK_SIZE = 1 << 20  # Copy uploads to disk 1 MiB at a time
+RESPONSE_CACHE_SIZE = 512  # Endpoint responses kept for identical requests
+
+def json_loads(data: str) -> Any:
+    """Parse a JSON message, using orjson when available"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def json_dumps(obj: Any) -> str:
+    """Serialize a JSON message, using orjson when available"""
+    return orjson.dumps(obj).decode("utf-8") if orjson is not None else json.dumps(obj)
+
 class ChatMessage(BaseModel):
     message: str
     context: Optional[str] = None
+    no_cache: bool = False
 
 class CodeRequest(BaseModel):
     prompt: str
     language: Optional[str] = None
     template: Optional[str] = None
+    no_cache: bool = False
 
 class AnalysisRequest(BaseModel):
     code: str
     language: str = "python"
     deep_analysis: bool = False
+    no_cache: bool = False
 
 class ConnectionManager:
     """Manages WebSocket connections for real-time features"""
     
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Set[WebSocket] = set()
     
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
     
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        self.active_connections.discard(websocket)
     
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
     
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+        # Send to every client concurrently so one slow socket can't hold up the rest
+        connections = list(self.active_connections)
+        results = await asyncio.gather(
+            *(connection.send_text(message) for connection in connections),
+            return_exceptions=True
+        )
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                self.disconnect(connection)
 
 def create_app(model_path: str = "deepseek-coder-1.3b-instruct.Q4_K_M.gguf") -> FastAPI:
     """Create and configure the FastAPI application"""
@@ -61,7 +92,8 @@ def create_app(model_path: str = "deepseek-coder-1.3b-instruct.Q4_K_M.gguf") ->
         description="The Ultimate Offline AI Developer Assistant",
         version="2.0.0",
         docs_url="/api/docs",
-        redoc_url="/api/redoc"
+        redoc_url="/api/redoc",
+        default_response_class=DefaultJSONResponse
     )
     
     # Add CORS middleware
@@ -73,11 +105,38 @@ def create_app(model_path: str = "deepseek-coder-1.3b-instruct.Q4_K_M.gguf") ->
         allow_headers=["*"],
     )
     
+    # Compress the UI and JSON responses
+    app.add_middleware(GZipMiddleware, minimum_size=500)
+    
     # Initialize components
-    assistant = CodeAssistant(model_path)
+    assistant = CodeAssistant.get(model_path)
     memory = ConversationMemory()
-    analyzer = CodeAnalyzer(model_path)
+    analyzer = CodeAnalyzer(assistant)  # Share the loaded weights and KV cache
     manager = ConnectionManager()
+    model_info = {"name": Path(model_path).name, "path": model_path}
+    
+    # LRU cache of generated responses, keyed on a digest of the request
+    response_cache: "OrderedDict[bytes, Any]" = OrderedDict()
+    
+    def cache_key(*parts: Any) -> bytes:
+        """Digest identifying an endpoint call by its inputs"""
+        return hashlib.blake2b("\0".join(map(str, parts)).encode("utf-8"), digest_size=16).digest()
+    
+    def cache_get(key: bytes) -> Any:
+        """Return a cached response and mark it recently used, or None"""
+        response = response_cache.get(key)
+        if response is not None:
+            response_cache.move_to_end(key)
+        return response
+    
+    def cache_put(key: bytes, response: Any):
+        """Store a response, evicting the least recently used one"""
+        # Don't pin failures in the cache
+        if isinstance(response, str) and response.startswith(("Error generating response:", "Error generating advanced code:")):
+            return
+        response_cache[key] = response
+        if len(response_cache) > RESPONSE_CACHE_SIZE:
+            response_cache.popitem(last=False)
     
     # Create necessary directories
     static_dir = Path("static")
@@ -91,24 +150,23 @@ def create_app(model_path: str = "deepseek-coder-1.3b-instruct.Q4_K_M.gguf") ->
     # Initialize templates
     templates = Jinja2Templates(directory="templates")
     
-    @app.on_startup
+    @app.on_event("startup")
     async def startup_event():
         """Initialize the application"""
         print("🚀 God-Tier Coding Agent Web Server Starting...")
         print("🤖 Loading AI model...")
         # Create default templates and static files if they don't exist
-        await create_default_ui_files()
-    
-    @app.get("/", response_class=HTMLResponse)
-    async def home():
-        """Serve the main application"""
-        return await get_index_html()
+        create_default_ui_files()
     
     @app.post("/api/chat")
     async def chat_endpoint(request: ChatMessage):
         """Handle chat messages"""
         try:
-            response = assistant.generate_response(request.message, request.context or "")
+            key = cache_key("chat", request.message, request.context or "")
+            response = None if request.no_cache else cache_get(key)
+            if response is None:
+                response = await assistant.agenerate_response(request.message, request.context or "")
+                cache_put(key, response)
             memory.add_exchange(request.message, response)
             
             return {
@@ -123,11 +181,16 @@ def create_app(model_path: str = "deepseek-coder-1.3b-instruct.Q4_K_M.gguf") ->
     async def generate_code(request: CodeRequest):
         """Generate code from prompt"""
         try:
-            response = assistant.generate_advanced_code(
-                request.prompt,
-                language=request.language,
-                template=request.template
-            )
+            key = cache_key("code", request.prompt, request.language, request.template)
+            response = None if request.no_cache else cache_get(key)
+            if response is None:
+                response = await assistant.run_in_executor(
+                    assistant.generate_advanced_code,
+                    request.prompt,
+                    language=request.language,
+                    template=request.template
+                )
+                cache_put(key, response)
             
             return {
                 "code": response,
@@ -141,11 +204,22 @@ def create_app(model_path: str = "deepseek-coder-1.3b-instruct.Q4_K_M.gguf") ->
     async def analyze_code(request: AnalysisRequest):
         """Analyze code and provide insights"""
         try:
-            results = analyzer.analyze_code_string(
-                request.code,
-                request.language,
-                deep_analysis=request.deep_analysis
-            )
+            key = cache_key("analyze", request.code, request.language, request.deep_analysis)
+            results = None if request.no_cache else cache_get(key)
+            # Deep analysis uses the model, so it must run on the model thread
+            if results is None and request.deep_analysis:
+                results = await analyzer.assistant.run_in_executor(
+                    analyzer.analyze_code_string,
+                    request.code,
+                    request.language,
+                    deep_analysis=True
+                )
+                cache_put(key, results)
+            elif results is None:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    None, analyzer.analyze_code_string, request.code, request.language
+                )
+                cache_put(key, results)
             
             return {
                 "analysis": results,
@@ -161,8 +235,11 @@ def create_app(model_path: str = "deepseek-coder-1.3b-instruct.Q4_K_M.gguf") ->
             file_path = uploads_dir / file.filename
             
             async with aiofiles.open(file_path, "wb") as f:
-                content = await file.read()
-                await f.write(content)
+                while True:
+                    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    await f.write(chunk)
             
             return {
                 "filename": file.filename,
@@ -177,13 +254,16 @@ def create_app(model_path: str = "deepseek-coder-1.3b-instruct.Q4_K_M.gguf") ->
         """List uploaded files"""
         try:
             files = []
-            for file_path in uploads_dir.iterdir():
-                if file_path.is_file():
-                    files.append({
-                        "name": file_path.name,
-                        "size": file_path.stat().st_size,
-                        "modified": file_path.stat().st_mtime
-                    })
+            # scandir entries carry the file type, so only one stat per file
+            with os.scandir(uploads_dir) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files.append({
+                            "name": entry.name,
+                            "size": stat.st_size,
+                            "modified": stat.st_mtime
+                        })
             
             return {"files": files, "status": "success"}
         except Exception as e:
@@ -196,12 +276,12 @@ def create_app(model_path: str = "deepseek-coder-1.3b-instruct.Q4_K_M.gguf") ->
         try:
             while True:
                 data = await websocket.receive_text()
-                message_data = json.loads(data)
+                message_data = json_loads(data)
                 
                 if message_data["type"] == "chat":
-                    response = assistant.generate_response(message_data["message"])
+                    response = await assistant.agenerate_response(message_data["message"])
                     await manager.send_personal_message(
-                        json.dumps({
+                        json_dumps({
                             "type": "response",
                             "message": response
                         }),
@@ -217,10 +297,7 @@ def create_app(model_path: str = "deepseek-coder-1.3b-instruct.Q4_K_M.gguf") ->
         stats = memory.get_statistics()
         return {
             "conversation_stats": stats,
-            "model_info": {
-                "name": Path(model_path).name,
-                "path": model_path
-            },
+            "model_info": model_info,
             "connections": len(manager.active_connections),
             "status": "running"
         }
@@ -228,10 +305,12 @@ def create_app(model_path: str = "deepseek-coder-1.3b-instruct.Q4_K_M.gguf") ->
     # Mount static files (will be created by create_default_ui_files)
     if static_dir.exists():
         app.mount("/static", StaticFiles(directory="static"), name="static")
+        # Serve the main application; mounted last so the API routes take precedence
+        app.mount("/", StaticFiles(directory="static", html=True), name="root")
     
     return app
 
-async def create_default_ui_files():
+def create_default_ui_files():
     """Create default UI files if they don't exist"""
     
     # Create index.html
@@ -453,18 +532,8 @@ async def create_default_ui_files():
 </body>
 </html>"""
     
-    templates_dir = Path("templates")
-    templates_dir.mkdir(exist_ok=True)
+    static_dir = Path("static")
+    static_dir.mkdir(exist_ok=True)
     
-    async with aiofiles.open("templates/index.html", "w") as f:
-        await f.write(index_html)
-
-async def get_index_html():
-    """Get the main index.html content"""
-    try:
-        async with aiofiles.open("templates/index.html", "r") as f:
-            return await f.read()
-    except FileNotFoundError:
-        await create_default_ui_files()
-        async with aiofiles.open("templates/index.html", "r") as f:
-            return await f.read() 
\ No newline at end of file
+    # A single small write at startup; a thread hop would cost more than it saves
+    (static_dir / "index.html").write_text(index_html, encoding="utf-8")
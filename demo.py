@@ -4,24 +4,25 @@
 Showcase the incredible capabilities of your AI coding assistant!
 """
 
-import time
 import asyncio
+import sys
 from pathlib import Path
-from rich.console import Console
+from rich.console import Console, Group
 from rich.panel import Panel
 from rich.columns import Columns
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.live import Live
 from rich.table import Table
 from rich.syntax import Syntax
+from rich.spinner import Spinner
+from rich.text import Text
 
 console = Console()
 
-def show_welcome():
-    """Show welcome message"""
-    
-    welcome = Panel(
-        """[bold cyan]🚀 Welcome to the God-Tier Coding Agent Demo![/bold cyan]
+# The demo content never changes, so every renderable is built once at import
+
+_WELCOME_PANEL = Panel(
+    """[bold cyan]🚀 Welcome to the God-Tier Coding Agent Demo![/bold cyan]
 
 [bold green]What you're about to see:[/bold green]
 • 🌐 Beautiful Web Interface Launch
@@ -31,64 +32,53 @@ def show_welcome():
 • 🎨 Stunning UI Components
 
 [bold yellow]This is the future of AI-assisted development![/bold yellow]""",
-        title="Demo Starting",
-        border_style="cyan",
-        padding=(1, 2)
-    )
-    
-    console.print(welcome)
+    title="Demo Starting",
+    border_style="cyan",
+    padding=(1, 2)
+)
 
-def demo_features():
-    """Demo key features"""
-    
-    features = [
-        ("🌐 Web Interface", "Beautiful modern UI with real-time chat"),
-        ("🧠 Advanced AI", "Multi-model support with context awareness"),
-        ("⚡ Code Generation", "Smart templates and best practices"),
-        ("🔍 Code Analysis", "Deep analysis with security scanning"),
-        ("🎯 Developer Tools", "Git integration and auto-formatting"),
-        ("📊 Performance", "Benchmarking and optimization"),
-    ]
-    
-    console.print("\n[bold cyan]🌟 God-Tier Features:[/bold cyan]\n")
-    
-    for feature, description in features:
-        console.print(f"  {feature} - [dim]{description}[/dim]")
-        time.sleep(0.3)
+_FEATURES = (
+    ("🌐 Web Interface", "Beautiful modern UI with real-time chat"),
+    ("🧠 Advanced AI", "Multi-model support with context awareness"),
+    ("⚡ Code Generation", "Smart templates and best practices"),
+    ("🔍 Code Analysis", "Deep analysis with security scanning"),
+    ("🎯 Developer Tools", "Git integration and auto-formatting"),
+    ("📊 Performance", "Benchmarking and optimization"),
+)
+_FEATURE_LINES = tuple(
+    Text.from_markup(f"  {feature} - [dim]{description}[/dim]") for feature, description in _FEATURES
+)
 
-def demo_code_generation():
-    """Demo code generation"""
-    
-    console.print("\n[bold cyan]⚡ Code Generation Demo[/bold cyan]")
-    
-    with console.status("[bold green]AI is generating code..."):
-        time.sleep(2)  # Simulate generation time
-    
-    # Example generated code
-    code = '''def fibonacci_sequence(n):
+# Example generated code
+_GENERATED_CODE = '''import numpy as np
+from numba import njit
+
+@njit(cache=True)
+def fibonacci_sequence(n):
     """
     Generate Fibonacci sequence up to n terms.
     
+    Compiled to machine code by Numba and written into a
+    preallocated array, so it runs at native speed.
+    
     Args:
         n (int): Number of terms to generate
         
     Returns:
-        list: Fibonacci sequence
+        numpy.ndarray: Fibonacci sequence (int64)
         
     Example:
         >>> fibonacci_sequence(10)
-        [0, 1, 1, 2, 3, 5, 8, 13, 21, 34]
+        array([ 0,  1,  1,  2,  3,  5,  8, 13, 21, 34])
     """
-    if n <= 0:
-        return []
-    elif n == 1:
-        return [0]
-    elif n == 2:
-        return [0, 1]
+    sequence = np.empty(max(n, 0), dtype=np.int64)
+    if n >= 1:
+        sequence[0] = 0
+    if n >= 2:
+        sequence[1] = 1
     
-    sequence = [0, 1]
     for i in range(2, n):
-        sequence.append(sequence[i-1] + sequence[i-2])
+        sequence[i] = sequence[i-1] + sequence[i-2]
     
     return sequence
 
@@ -96,41 +86,33 @@ def demo_code_generation():
 if __name__ == "__main__":
     result = fibonacci_sequence(10)
     print(f"Fibonacci sequence: {result}")'''
-    
-    syntax = Syntax(code, "python", theme="monokai", line_numbers=True)
-    console.print(Panel(
-        syntax,
-        title="✨ AI Generated Python Code",
-        border_style="green"
-    ))
 
-def demo_analysis():
-    """Demo code analysis"""
-    
-    console.print("\n[bold cyan]🔍 Code Analysis Demo[/bold cyan]")
-    
-    # Create analysis table
-    table = Table(title="📊 Code Analysis Results")
-    table.add_column("Metric", style="bold cyan")
-    table.add_column("Value", style="green")
-    table.add_column("Status", style="yellow")
-    
-    table.add_row("Lines of Code", "45", "✅ Good")
-    table.add_row("Functions", "1", "✅ Well-structured")
-    table.add_row("Documentation", "100%", "✅ Excellent")
-    table.add_row("Security Issues", "0", "✅ Secure")
-    table.add_row("Code Quality", "95%", "✅ High Quality")
-    table.add_row("Performance", "Optimized", "✅ Efficient")
-    
-    console.print(table)
+_CODE_PANEL = Panel(
+    Syntax(_GENERATED_CODE, "python", theme="monokai", line_numbers=True),
+    title="✨ AI Generated Python Code",
+    border_style="green"
+)
+_code_panel_output = {}  # Rendered _CODE_PANEL by console width
 
-def demo_web_interface():
-    """Demo web interface preview"""
-    
-    console.print("\n[bold cyan]🌐 Web Interface Preview[/bold cyan]")
-    
-    # ASCII art representation of the web interface
-    ui_preview = """
+_ANALYSIS_TABLE = Table(title="📊 Code Analysis Results")
+_ANALYSIS_TABLE.add_column("Metric", style="bold cyan")
+_ANALYSIS_TABLE.add_column("Value", style="green")
+_ANALYSIS_TABLE.add_column("Status", style="yellow")
+
+_ANALYSIS_ROWS = (
+    ("Lines of Code", "45", "✅ Good"),
+    ("Functions", "1", "✅ Well-structured"),
+    ("Documentation", "100%", "✅ Excellent"),
+    ("Security Issues", "0", "✅ Secure"),
+    ("Code Quality", "95%", "✅ High Quality"),
+    ("Performance", "Optimized", "✅ Efficient"),
+)
+for row in _ANALYSIS_ROWS:
+    _ANALYSIS_TABLE.add_row(*row)
+
+# ASCII art representation of the web interface
+_UI_PREVIEW_PANEL = Panel(
+    """
 ╭─────────────────────────────────────────────────────────────────╮
 │ 🚀 God-Tier Coding Agent                    [🌙] [⚙️] [❓]    │
 ├─────────────────────────────────────────────────────────────────┤
@@ -152,74 +134,64 @@ def demo_web_interface():
 │  │ 📖 Docs: Generated  │  │  Memory: ██████░░░░ 60%           │
 │  └─────────────────────┘  │  Response Time: 0.8s              │
 ╰─────────────────────────────────────────────────────────────────╯
-    """
-    
-    console.print(Panel(ui_preview, title="Web Interface Preview", border_style="blue"))
+    """,
+    title="Web Interface Preview",
+    border_style="blue"
+)
 
-def show_commands():
-    """Show available commands"""
-    
-    commands = Table(title="🎯 Available Commands")
-    commands.add_column("Command", style="bold cyan")
-    commands.add_column("Description", style="green")
-    commands.add_column("Example", style="yellow")
-    
-    commands.add_row(
-        "python3 main.py web",
-        "Launch beautiful web interface",
-        "Full-featured UI with real-time chat"
-    )
-    commands.add_row(
-        "python3 main.py chat",
-        "Enhanced CLI interface",
-        "Rich terminal with advanced features"
-    )
-    commands.add_row(
-        "python3 main.py code",
-        "Generate code from description",
-        'python3 main.py code "create a web scraper"'
-    )
-    commands.add_row(
-        "python3 main.py analyze",
-        "Deep code analysis",
-        "python3 main.py analyze myfile.py --deep"
-    )
-    commands.add_row(
-        "python3 main.py setup",
-        "Interactive setup wizard",
-        "Configure models and preferences"
-    )
-    commands.add_row(
-        "python3 main.py benchmark",
-        "Performance benchmarking",
-        "Test model speed and quality"
-    )
-    
-    console.print(commands)
+_COMMANDS_TABLE = Table(title="🎯 Available Commands")
+_COMMANDS_TABLE.add_column("Command", style="bold cyan")
+_COMMANDS_TABLE.add_column("Description", style="green")
+_COMMANDS_TABLE.add_column("Example", style="yellow")
 
-def demo_performance():
-    """Demo performance metrics"""
-    
-    console.print("\n[bold cyan]⚡ Performance Metrics[/bold cyan]")
-    
-    # Performance comparison
-    perf_table = Table(title="🏁 Speed Comparison")
-    perf_table.add_column("Model", style="bold")
-    perf_table.add_column("Load Time", style="cyan")
-    perf_table.add_column("Response Time", style="green")
-    perf_table.add_column("Quality", style="yellow")
-    
-    perf_table.add_row("DeepSeek 1.3B", "2.1s", "0.8s", "94% ⭐⭐⭐⭐")
-    perf_table.add_row("CodeLlama 7B", "5.2s", "1.2s", "97% ⭐⭐⭐⭐⭐")
-    perf_table.add_row("Qwen 1.5B", "1.8s", "0.6s", "92% ⭐⭐⭐⭐")
-    
-    console.print(perf_table)
+_COMMANDS_TABLE.add_row(
+    "python3 main.py web",
+    "Launch beautiful web interface",
+    "Full-featured UI with real-time chat"
+)
+_COMMANDS_TABLE.add_row(
+    "python3 main.py chat",
+    "Enhanced CLI interface",
+    "Rich terminal with advanced features"
+)
+_COMMANDS_TABLE.add_row(
+    "python3 main.py code",
+    "Generate code from description",
+    'python3 main.py code "create a web scraper"'
+)
+_COMMANDS_TABLE.add_row(
+    "python3 main.py analyze",
+    "Deep code analysis",
+    "python3 main.py analyze myfile.py --deep"
+)
+_COMMANDS_TABLE.add_row(
+    "python3 main.py setup",
+    "Interactive setup wizard",
+    "Configure models and preferences"
+)
+_COMMANDS_TABLE.add_row(
+    "python3 main.py benchmark",
+    "Performance benchmarking",
+    "Test model speed and quality"
+)
 
-def show_next_steps():
-    """Show next steps"""
-    
-    next_steps = Panel(
-        """[bold green]🚀 Ready to Get Started?[/bold green]
+# Performance comparison
+_PERFORMANCE_TABLE = Table(title="🏁 Speed Comparison")
+_PERFORMANCE_TABLE.add_column("Model", style="bold")
+_PERFORMANCE_TABLE.add_column("Load Time", style="cyan")
+_PERFORMANCE_TABLE.add_column("Response Time", style="green")
+_PERFORMANCE_TABLE.add_column("Quality", style="yellow")
+
+_PERFORMANCE_ROWS = (
+    ("DeepSeek 1.3B", "2.1s", "0.8s", "94% ⭐⭐⭐⭐"),
+    ("CodeLlama 7B", "5.2s", "1.2s", "97% ⭐⭐⭐⭐⭐"),
+    ("Qwen 1.5B", "1.8s", "0.6s", "92% ⭐⭐⭐⭐"),
+)
+for row in _PERFORMANCE_ROWS:
+    _PERFORMANCE_TABLE.add_row(*row)
+
+_NEXT_STEPS_PANEL = Panel(
+    """[bold green]🚀 Ready to Get Started?[/bold green]
 
 [bold cyan]Quick Start Commands:[/bold cyan]
 1. [bold]python3 main.py setup[/bold] - Run the interactive setup wizard
@@ -233,45 +205,120 @@ def show_next_steps():
 • Join our community for tips and updates
 
 [bold magenta]This is just the beginning of your god-tier coding journey![/bold magenta]""",
-        title="Next Steps",
-        border_style="green",
-        padding=(1, 2)
-    )
+    title="Next Steps",
+    border_style="green",
+    padding=(1, 2)
+)
+
+def _rendered_code_panel() -> str:
+    """Render the code panel once per console width and reuse the output"""
+    
+    width = console.width
+    if width not in _code_panel_output:
+        with console.capture() as capture:
+            console.print(_CODE_PANEL)
+        _code_panel_output[width] = capture.get()
+    return _code_panel_output[width]
+
+def show_welcome():
+    """Show welcome message"""
     
-    console.print(next_steps)
+    console.print(_WELCOME_PANEL)
 
-def main():
-    """Run the complete demo"""
+async def demo_features():
+    """Demo key features"""
+    
+    console.print("\n[bold cyan]🌟 God-Tier Features:[/bold cyan]\n")
+    
+    # One live region grows line by line instead of a full print per feature
+    shown = Group()
+    with Live(shown, console=console, refresh_per_second=10) as live:
+        for line in _FEATURE_LINES:
+            shown.renderables.append(line)
+            live.update(shown, refresh=True)
+            await asyncio.sleep(0.3)
+
+async def demo_code_generation():
+    """Demo code generation"""
+    
+    console.print("\n[bold cyan]⚡ Code Generation Demo[/bold cyan]")
+    
+    with Live(Spinner("dots", text="[bold green]AI is generating code..."), console=console, transient=True):
+        await asyncio.sleep(2)  # Simulate generation time
+    
+    console.file.write(_rendered_code_panel())
+    console.file.flush()
+
+def demo_analysis():
+    """Demo code analysis"""
+    
+    console.print("\n[bold cyan]🔍 Code Analysis Demo[/bold cyan]")
+    
+    console.print(_ANALYSIS_TABLE)
+
+def demo_web_interface():
+    """Demo web interface preview"""
+    
+    console.print("\n[bold cyan]🌐 Web Interface Preview[/bold cyan]")
+    
+    console.print(_UI_PREVIEW_PANEL)
+
+def show_commands():
+    """Show available commands"""
+    
+    console.print(_COMMANDS_TABLE)
+
+def demo_performance():
+    """Demo performance metrics"""
+    
+    console.print("\n[bold cyan]⚡ Performance Metrics[/bold cyan]")
+    
+    console.print(_PERFORMANCE_TABLE)
+
+def show_next_steps():
+    """Show next steps"""
+    
+    console.print(_NEXT_STEPS_PANEL)
+
+async def run_demo():
+    """Run the demo sequence on the event loop"""
     
     console.clear()
     
-    # Demo sequence
+    # Demo sequence; sections print in order, so only the pauses are awaited
     show_welcome()
-    time.sleep(2)
+    await asyncio.sleep(2)
     
-    demo_features()
-    time.sleep(1)
+    await demo_features()
+    await asyncio.sleep(1)
     
-    demo_code_generation()
-    time.sleep(2)
+    await demo_code_generation()
+    await asyncio.sleep(2)
     
     demo_analysis()
-    time.sleep(1)
+    await asyncio.sleep(1)
     
     demo_web_interface()
-    time.sleep(2)
+    await asyncio.sleep(2)
     
     demo_performance()
-    time.sleep(1)
+    await asyncio.sleep(1)
     
     show_commands()
-    time.sleep(1)
+    await asyncio.sleep(1)
     
     show_next_steps()
     
     console.print("\n[bold cyan]Demo complete! 🎉[/bold cyan]")
-    console.print("[dim]Press Enter to exit...[/dim]")
-    input()
+    # Only wait for Enter when someone is at the terminal (not when piped in CI)
+    if sys.stdin.isatty():
+        console.print("[dim]Press Enter to exit...[/dim]")
+        await asyncio.get_running_loop().run_in_executor(None, sys.stdin.readline)
+
+def main():
+    """Run the complete demo"""
+    
+    asyncio.run(run_demo())
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -4,25 +4,60 @@ God-Tier Offline Coding Agent - The Ultimate Local AI Developer Assistant
 """
 
 import typer
-import uvicorn
-import asyncio
 from pathlib import Path
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
 from typing import Optional
 
-from agent.model import CodeAssistant
-from agent.memory import ConversationMemory
-from agent.web_server import create_app
-from agent.cli_interface import CLIInterface
-
 app = typer.Typer(
     help="🚀 God-Tier Offline Coding Agent - The Ultimate AI Developer Assistant",
     rich_markup_mode="rich"
 )
 console = Console()
 
+# Command banners: only the web panel has values filled in per run
+_WEB_PANEL_TEMPLATE = (
+    "[bold cyan]🚀 God-Tier Coding Agent - Web Interface[/bold cyan]\n"
+    "🌐 Server: http://{host}:{port}\n"
+    "🤖 Model: {model}\n"
+    "🔄 Auto-reload: {reload}\n"
+    "\n[bold green]Features:[/bold green]\n"
+    "• 🎨 Beautiful Modern UI\n"
+    "• 💬 Real-time Chat Interface\n"
+    "• 📝 Advanced Code Editor\n"
+    "• 🗂️ File Management\n"
+    "• 🔧 Developer Tools Integration\n"
+    "• 🎯 AI Pair Programming\n"
+    "• 📊 Code Analysis & Visualization"
+)
+_SETUP_PANEL = Panel.fit(
+    "[bold cyan]🛠️ God-Tier Coding Agent Setup[/bold cyan]\n"
+    "Let's configure your ultimate coding assistant!",
+    border_style="cyan"
+)
+
+def _open_browser_when_ready(host: str, port: int, timeout: float = 60.0):
+    """Open the web UI in a new tab once the server accepts connections"""
+    import socket
+    import threading
+    import time
+    import webbrowser
+    
+    def wait_and_open():
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection((host, port), timeout=1):
+                    break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            return
+        webbrowser.open_new_tab(f"http://{host}:{port}")
+    
+    threading.Thread(target=wait_and_open, daemon=True).start()
+
 @app.command()
 def web(
     host: str = typer.Option("127.0.0.1", "--host", "-h", help="Host to bind to"),
@@ -38,27 +73,24 @@ def web(
     """🌐 Launch the beautiful web interface"""
     
     console.print(Panel.fit(
-        "[bold cyan]🚀 God-Tier Coding Agent - Web Interface[/bold cyan]\n"
-        f"🌐 Server: http://{host}:{port}\n"
-        f"🤖 Model: {Path(model_path).name}\n"
-        f"🔄 Auto-reload: {'✅' if reload else '❌'}\n"
-        "\n[bold green]Features:[/bold green]\n"
-        "• 🎨 Beautiful Modern UI\n"
-        "• 💬 Real-time Chat Interface\n"
-        "• 📝 Advanced Code Editor\n"
-        "• 🗂️ File Management\n"
-        "• 🔧 Developer Tools Integration\n"
-        "• 🎯 AI Pair Programming\n"
-        "• 📊 Code Analysis & Visualization",
+        _WEB_PANEL_TEMPLATE.format(
+            host=host,
+            port=port,
+            model=Path(model_path).name,
+            reload='✅' if reload else '❌'
+        ),
         border_style="cyan"
     ))
     
+    # The web stack is only imported for this command
+    import uvicorn
+    from agent.web_server import create_app
+    
     # Create FastAPI app with the model
     fastapi_app = create_app(model_path)
     
     if open_browser:
-        import webbrowser
-        webbrowser.open(f"http://{host}:{port}")
+        _open_browser_when_ready(host, port)
     
     # Run the server
     uvicorn.run(
@@ -95,21 +127,28 @@ def chat(
     """💬 Enhanced interactive chat with the coding assistant"""
     
     if enhanced_mode:
+        from agent.cli_interface import CLIInterface
+        
         cli = CLIInterface(model_path, max_tokens, temperature)
         cli.run_enhanced_chat()
     else:
         # Legacy basic chat mode
         try:
-            if not Path(model_path).exists():
+            model_file = Path(model_path)
+            if not model_file.exists():
                 console.print(f"[red]❌ Model file not found: {model_path}[/red]")
                 raise typer.Exit(1)
             
+            from contextlib import closing
+            from agent.model import CodeAssistant
+            from agent.memory import ConversationMemory
+            
             assistant = CodeAssistant(model_path, max_tokens, temperature)
             memory = ConversationMemory()
             
             console.print(Panel.fit(
                 "[bold green]🤖 Basic Chat Mode[/bold green]\n"
-                f"Model: {Path(model_path).name}\n"
+                f"Model: {model_file.name}\n"
                 "Type 'quit' to exit",
                 border_style="blue"
             ))
@@ -121,15 +160,23 @@ def chat(
                         break
                     
                     console.print("\n🤖 Assistant:")
-                    with console.status("[bold green]Thinking..."):
-                        response = assistant.generate_response(prompt, memory.get_context())
-                        memory.add_exchange(prompt, response)
-                        console.print(response)
+                    # Streaming returns to Python after every token, so Ctrl-C lands
+                    # promptly and closing the stream stops generation there
+                    with closing(assistant.stream_response(prompt, memory.get_context())) as stream:
+                        # The spinner covers reading the prompt, until the first text arrives
+                        with console.status("[bold green]Thinking..."):
+                            chunks = [next(stream, "").lstrip()]
+                        console.out(chunks[0], end="", highlight=False)
+                        for chunk in stream:
+                            chunks.append(chunk)
+                            console.out(chunk, end="", highlight=False)
+                    console.out()
+                    memory.add_exchange(prompt, "".join(chunks).strip())
                         
                 except KeyboardInterrupt:
                     console.print("\n[yellow]Use 'quit' to exit[/yellow]")
                 except Exception as e:
-                    console.print(f"[red]Error: {e}[/red]")
+                    typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
                     
         except Exception as e:
             console.print(f"[red]Failed to initialize assistant: {e}[/red]")
@@ -150,6 +197,8 @@ def code(
     """⚡ Advanced code generation with templates and language detection"""
     
     try:
+        from agent.model import CodeAssistant
+        
         assistant = CodeAssistant(model_path)
         
         console.print(f"[bold cyan]Generating code:[/bold cyan] {prompt}")
@@ -171,7 +220,7 @@ def code(
             console.print(f"\n[green]💾 Saved to: {output_file}[/green]")
             
     except Exception as e:
-        console.print(f"[red]Error: {e}[/red]")
+        typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
         raise typer.Exit(1)
 
 @app.command() 
@@ -184,7 +233,8 @@ def analyze(
     ),
     deep_analysis: bool = typer.Option(False, "--deep", help="Enable deep AI analysis"),
     generate_docs: bool = typer.Option(False, "--docs", help="Generate documentation"),
-    security_scan: bool = typer.Option(False, "--security", help="Run security analysis")
+    security_scan: bool = typer.Option(False, "--security", help="Run security analysis"),
+    output_file: Optional[str] = typer.Option(None, "--output", "-o", help="Stream per-file results to an NDJSON file (directories only)")
 ):
     """🔍 Advanced code analysis and insights"""
     
@@ -205,37 +255,36 @@ def analyze(
                 target_path,
                 deep_analysis=deep_analysis,
                 generate_docs=generate_docs,
-                security_scan=security_scan
+                security_scan=security_scan,
+                output_path=Path(output_file) if output_file else None
             )
         
         analyzer.display_results(results)
         
     except Exception as e:
-        console.print(f"[red]Error: {e}[/red]")
+        typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
         raise typer.Exit(1)
 
 @app.command()
 def setup():
     """🛠️ Interactive setup and configuration"""
     
-    console.print(Panel.fit(
-        "[bold cyan]🛠️ God-Tier Coding Agent Setup[/bold cyan]\n"
-        "Let's configure your ultimate coding assistant!",
-        border_style="cyan"
-    ))
+    console.print(_SETUP_PANEL)
     
     from agent.setup_wizard import SetupWizard
     wizard = SetupWizard()
     wizard.run()
 
 @app.command()
-def update():
+def update(
+    force: bool = typer.Option(False, "--force", help="Offer to reinstall packages even when none are outdated")
+):
     """📦 Update models and components"""
     
     console.print("[bold cyan]📦 Checking for updates...[/bold cyan]")
     from agent.updater import Updater
     updater = Updater()
-    updater.check_and_update()
+    updater.check_and_update(force)
 
 @app.command()
 def benchmark(
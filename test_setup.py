@@ -3,76 +3,63 @@
 Test script to verify the offline coding assistant setup.
 """
 
+import importlib
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Third-party modules the assistant needs
+REQUIRED_MODULES = ["typer", "llama_cpp", "rich", "pygments", "pydantic"]
+
+# (module, class) pairs the agent package must provide
+AGENT_CLASSES = [
+    ("agent.model", "CodeAssistant"),
+    ("agent.memory", "ConversationMemory"),
+    ("agent.code_tools", "CodeTools"),
+]
+
+def _safe_import(name):
+    """Import a module by name, returning (name, error message or None)."""
+    try:
+        importlib.import_module(name)
+        return name, None
+    except ImportError as e:
+        return name, str(e)
+
 def test_imports():
     """Test if all required modules can be imported."""
     print("Testing imports...")
     
-    try:
-        import typer
-        print("✅ typer imported successfully")
-    except ImportError as e:
-        print(f"❌ Failed to import typer: {e}")
-        return False
-    
-    try:
-        import llama_cpp
-        print("✅ llama_cpp imported successfully")
-    except ImportError as e:
-        print(f"❌ Failed to import llama_cpp: {e}")
-        return False
-    
-    try:
-        import rich
-        print("✅ rich imported successfully")
-    except ImportError as e:
-        print(f"❌ Failed to import rich: {e}")
-        return False
+    # Filesystem lookups and native library loads (llama_cpp) overlap across threads
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(_safe_import, REQUIRED_MODULES))
     
-    try:
-        import pygments
-        print("✅ pygments imported successfully")
-    except ImportError as e:
-        print(f"❌ Failed to import pygments: {e}")
-        return False
+    # Report all probes in one write
+    lines = [
+        f"✅ {name} imported successfully" if error is None else f"❌ Failed to import {name}: {error}"
+        for name, error in results
+    ]
+    print("\n".join(lines))
     
-    try:
-        import pydantic
-        print("✅ pydantic imported successfully")
-    except ImportError as e:
-        print(f"❌ Failed to import pydantic: {e}")
-        return False
-    
-    return True
+    return all(error is None for _, error in results)
 
 def test_agent_modules():
     """Test if agent modules can be imported."""
     print("\nTesting agent modules...")
     
-    try:
-        from agent.model import CodeAssistant
-        print("✅ CodeAssistant imported successfully")
-    except ImportError as e:
-        print(f"❌ Failed to import CodeAssistant: {e}")
-        return False
-    
-    try:
-        from agent.memory import ConversationMemory
-        print("✅ ConversationMemory imported successfully")
-    except ImportError as e:
-        print(f"❌ Failed to import ConversationMemory: {e}")
-        return False
-    
-    try:
-        from agent.code_tools import CodeTools
-        print("✅ CodeTools imported successfully")
-    except ImportError as e:
-        print(f"❌ Failed to import CodeTools: {e}")
-        return False
+    all_imported = True
+    for module, class_name in AGENT_CLASSES:
+        _, error = _safe_import(module)
+        if error is None and not hasattr(sys.modules[module], class_name):
+            error = f"cannot import name '{class_name}' from '{module}'"
+        
+        if error is None:
+            print(f"✅ {class_name} imported successfully")
+        else:
+            print(f"❌ Failed to import {class_name}: {error}")
+            all_imported = False
     
-    return True
+    return all_imported
 
 def test_cli():
     """Test if CLI can be imported."""
@@ -92,11 +79,11 @@ def check_model_file():
     print("\nChecking model file...")
     
     model_path = Path("deepseek-coder-1.3b-instruct.Q4_K_M.gguf")
-    if model_path.exists():
+    try:
         size_mb = model_path.stat().st_size / (1024 * 1024)
         print(f"✅ Model file found: {model_path.name} ({size_mb:.1f} MB)")
         return True
-    else:
+    except FileNotFoundError:
         print("❌ Model file not found")
         print("Download it with:")
         print("wget https://huggingface.co/TheBloke/deepseek-coder-1.3B-instruct-GGUF/resolve/main/deepseek-coder-1.3b-instruct.Q4_K_M.gguf")
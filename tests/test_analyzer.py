@@ -0,0 +1,118 @@
+"""
+Tests for directory analysis in agent.analyzer.
+"""
+
+import json
+import os
+from concurrent.futures import Future
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("llama_cpp")
+
+from agent import analyzer
+from agent.analyzer import CodeAnalyzer
+from agent.model import CodeAssistant
+
+class InlineExecutor:
+    """Runs submissions inline and tracks how many finished results wait to be read."""
+    
+    instances = []
+    
+    def __init__(self, max_workers=None):
+        self.waiting = 0
+        self.max_waiting = 0
+        InlineExecutor.instances.append(self)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+    
+    def submit(self, fn, *args):
+        future = _TrackedFuture(self)
+        future.set_result(fn(*args))
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        return future
+
+class _TrackedFuture(Future):
+    def __init__(self, executor):
+        super().__init__()
+        self._executor = executor
+        self._read = False
+    
+    def result(self, timeout=None):
+        if not self._read:
+            self._read = True
+            self._executor.waiting -= 1
+        return super().result(timeout)
+
+def _make_analyzer():
+    assistant = mock.create_autospec(CodeAssistant, instance=True)
+    assistant.max_tokens = 64
+    assistant.generate_batch.side_effect = lambda prompts, context="": ["ok"] * len(prompts)
+    return CodeAnalyzer(assistant)
+
+def _write_tree(root, count):
+    for i in range(count):
+        package = root / f"pkg{i % 5}"
+        package.mkdir(exist_ok=True)
+        (package / f"mod{i}.py").write_text(f"import os\n\ndef f{i}():\n    return {i}\n")
+
+@pytest.fixture
+def inline_pool(monkeypatch):
+    InlineExecutor.instances = []
+    monkeypatch.setattr(analyzer, "ProcessPoolExecutor", InlineExecutor)
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    return InlineExecutor.instances
+
+def test_analyze_directory_bounds_in_flight_files(tmp_path, inline_pool):
+    _write_tree(tmp_path, 100)
+    code_analyzer = _make_analyzer()
+    
+    results = code_analyzer.analyze_directory(tmp_path, deep_analysis=True)
+    
+    window = CodeAnalyzer.AI_BATCH_FILES * 2
+    assert inline_pool[0].max_waiting == window
+    assert results['summary']['total_files'] == 100
+    assert all(r['ai_insights'] == "ok" for r in results['files_analyzed'])
+
+def test_analyze_directory_streams_ndjson_while_walking(tmp_path, inline_pool):
+    source = tmp_path / "src"
+    source.mkdir()
+    _write_tree(source, 100)
+    (source / "generated.py").write_text("x = 1\n" * 100)
+    code_analyzer = _make_analyzer()
+    code_analyzer.max_analyze_bytes = 200
+    
+    # Count the paths the walk has produced by the time the first AI batch is sent
+    walked = []
+    iter_code_files = code_analyzer._iter_code_files
+    def counting_walk(root):
+        for item in iter_code_files(root):
+            walked.append(item)
+            yield item
+    walked_at_first_batch = []
+    generate_batch = code_analyzer.assistant.generate_batch.side_effect
+    def recording_batch(prompts, context=""):
+        walked_at_first_batch.append(len(walked))
+        return generate_batch(prompts, context)
+    code_analyzer._iter_code_files = counting_walk
+    code_analyzer.assistant.generate_batch.side_effect = recording_batch
+    
+    output_path = tmp_path / "results.ndjson"
+    results = code_analyzer.analyze_directory(source, deep_analysis=True, output_path=output_path)
+    
+    window = CodeAnalyzer.AI_BATCH_FILES * 2
+    assert walked_at_first_batch[0] <= window + CodeAnalyzer.AI_BATCH_FILES + 1
+    assert 'files_analyzed' not in results
+    assert results['summary']['total_files'] == 100
+    assert results['summary']['skipped_files'] == 1
+    
+    records = [json.loads(line) for line in output_path.read_bytes().splitlines()]
+    assert len(records) == 101
+    assert sum(1 for r in records if r.get('skipped') == 'too_large') == 1
+    assert sum(1 for r in records if r.get('ai_insights') == "ok") == 100
@@ -0,0 +1,89 @@
+"""
+Tests for the semantic search index in agent.memory.
+"""
+
+import hashlib
+import sys
+import types
+
+import pytest
+
+np = pytest.importorskip("numpy")
+faiss = pytest.importorskip("faiss")
+
+from agent.memory import ConversationMemory
+
+class HashEncoder:
+    """Stand-in for SentenceTransformer: a fixed random unit vector per text."""
+    
+    DIMENSION = 32
+    
+    def __init__(self, model_name):
+        pass
+    
+    def get_sentence_embedding_dimension(self):
+        return self.DIMENSION
+    
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=True):
+        vectors = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:4], 'little')
+            vector = np.random.default_rng(seed).standard_normal(self.DIMENSION).astype('float32')
+            vectors.append(vector / np.linalg.norm(vector))
+        return np.stack(vectors)
+
+class SmallIndexMemory(ConversationMemory):
+    QUANTIZE_MIN_ROWS = 40
+    HNSW_MIN_ROWS = 80
+
+@pytest.fixture(autouse=True)
+def fake_sentence_transformers(monkeypatch):
+    module = types.ModuleType("sentence_transformers")
+    module.SentenceTransformer = HashEncoder
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+
+def _add(memory, start, stop):
+    for i in range(start, stop):
+        memory.add_exchange(f"question {i}", f"answer {i}")
+
+def _search(memory, i):
+    return [e['user'] for e in memory.search_history(f"question {i}\nanswer {i}", top_k=1)]
+
+def test_index_upgrades_with_row_count():
+    memory = SmallIndexMemory(max_history=50, semantic_search=True)
+    _add(memory, 0, 30)
+    assert _search(memory, 29) == ["question 29"]
+    assert isinstance(memory._index, faiss.IndexFlat)
+    
+    _add(memory, 30, 45)
+    assert _search(memory, 44) == ["question 44"]
+    assert isinstance(memory._index, faiss.IndexScalarQuantizer)
+    
+    _add(memory, 45, 85)
+    assert _search(memory, 84) == ["question 84"]
+    assert isinstance(memory._index, faiss.IndexHNSWSQ)
+    assert memory._index.ntotal == len(memory._indexed)
+
+def test_compaction_after_upgrade_keeps_live_rows():
+    memory = SmallIndexMemory(max_history=50, semantic_search=True)
+    # The index is built on the first search, then grows with every exchange
+    _add(memory, 0, 1)
+    assert _search(memory, 0) == ["question 0"]
+    _add(memory, 1, 90)
+    assert _search(memory, 89) == ["question 89"]
+    assert isinstance(memory._index, faiss.IndexHNSWSQ)
+    
+    # Past 2 * max_history rows the evicted exchanges are dropped from the graph
+    _add(memory, 90, 110)
+    assert _search(memory, 109) == ["question 109"]
+    assert isinstance(memory._index, faiss.IndexHNSWSQ)
+    assert memory._index.ntotal == len(memory._indexed) == 50
+    assert _search(memory, 60) == ["question 60"]
+    assert _search(memory, 10) == []
+
+def test_default_history_stays_flat():
+    memory = ConversationMemory(semantic_search=True)
+    _add(memory, 0, 100)
+    assert _search(memory, 99) == ["question 99"]
+    assert isinstance(memory._index, faiss.IndexFlat)
+    assert memory._index.ntotal <= 2 * memory.max_history